@@ -26,7 +26,10 @@ SECRET_KEY = os.getenv("DJANGO_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DEBUG")
 
-ALLOWED_HOSTS = []
+# Comma separated host names the API answers to
+ALLOWED_HOSTS = [
+    host for host in os.getenv('ALLOWED_HOSTS', '').split(',') if host
+]
 
 
 # Application definition
@@ -38,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -47,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,16 +84,122 @@ WSGI_APPLICATION = 'api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections persist for DB_CONN_MAX_AGE seconds and are checked before
+# their first query in each request. DB_POOL shares at most
+# DB_POOL_MAX_SIZE connections between the threads of each process instead.
+
+DB_POOL = bool(int(os.getenv('DB_POOL', 0)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.getenv('DB_HOST'),
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
-        'PASSWORD': os.getenv('DB_PASSWORD')
+        'PASSWORD': os.getenv('DB_PASSWORD'),
+        'CONN_MAX_AGE': int(
+            os.getenv('DB_CONN_MAX_AGE', 0 if DB_POOL else 60)
+        ),
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.getenv('DB_CONN_HEALTH_CHECKS', 1))
+        ),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'MAX_AGE': int(os.getenv('DB_POOL_MAX_AGE', 1800)),
+        } if DB_POOL else None,
     }
 }
 
+# Safe requests read from one of the comma separated DB_REPLICA_HOSTS,
+# except for DB_REPLICA_PIN_SECONDS after the same client sent a write
+
+DB_REPLICA_HOSTS = [
+    host for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host
+]
+
+DATABASE_REPLICAS = [
+    f'replica{i}' for i in range(1, len(DB_REPLICA_HOSTS) + 1)
+]
+
+DATABASES.update({
+    alias: {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': os.getenv('DB_REPLICA_PORT', ''),
+        'USER': os.getenv('DB_REPLICA_USER', os.getenv('DB_USER')),
+        'PASSWORD': os.getenv(
+            'DB_REPLICA_PASSWORD',
+            os.getenv('DB_PASSWORD')
+        ),
+        'TEST': {'MIRROR': 'default'},
+    }
+    for alias, host in zip(DATABASE_REPLICAS, DB_REPLICA_HOSTS)
+})
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# A shared backend (e.g. memcached) keeps invalidations consistent across
+# worker processes. Local memory caches are reported by the system checks
+# when WEB_CONCURRENCY, also read by gunicorn, runs more than one worker
+
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+
+
+# Auth token cache
+# Tokens are cached in the Django cache named by TOKEN_CACHE_ALIAS, shared by
+# every worker so invalidations reach them all. Set it empty for a
+# per-process LRU, only for a single process
+
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS', 'default')
+TOKEN_CACHE_MAX_SIZE = int(os.getenv('TOKEN_CACHE_MAX_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 60))
+
+
+# Async views
+# The ASGI entry point turns ASYNC_VIEWS on, running the recipe API list and
+# detail views on a pool of ASYNC_VIEW_WORKERS threads
+
+ASYNC_VIEWS = bool(int(os.getenv('ASYNC_VIEWS', 0)))
+ASYNC_VIEW_WORKERS = int(os.getenv('ASYNC_VIEW_WORKERS', 8))
+
+
+# Worker warm-up
+# The WSGI and ASGI entry points build the URL resolvers and serializers and
+# connect to the databases and caches before serving the first request.
+# Under ASGI only the pooled databases are connected, the others would be
+# connected from the event loop thread, which runs no queries
+
+WARMUP = bool(int(os.getenv('WARMUP', 1)))
+
+
+# Image renditions
+# Uploaded images are resized by a pool of worker threads, tasks beyond the
+# backlog are left for the generate_renditions command
+
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', 2))
+IMAGE_RENDITION_BACKLOG = int(os.getenv('IMAGE_RENDITION_BACKLOG', 100))
+
+# Uploaded images over either limit are refused before being decoded
+MAX_IMAGE_UPLOAD_SIZE = int(os.getenv('MAX_IMAGE_UPLOAD_SIZE', 10 * 2 ** 20))
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', 40_000_000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -132,6 +243,13 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/root'
 
+# Media transfers can be handed to the front proxy, with 'x-accel-redirect'
+# for nginx, through an internal location at MEDIA_ACCEL_PREFIX aliasing
+# MEDIA_ROOT, or with 'x-sendfile' for Apache and lighttpd
+
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
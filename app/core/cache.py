@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread safe in-process cache bounded in size and entry age"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Returns the value for key, unless it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+
+            return value
+
+    def set(self, key, value):
+        """Stores value, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Removes key from the cache"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes every entry from the cache"""
+        with self._lock:
+            self._entries.clear()
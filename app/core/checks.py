@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    """Warns about per-process caches when several workers serve requests
+
+    Each worker would keep its own cached lists, generations, pins and
+    tokens, and never see the invalidations of the others.
+    """
+    if settings.WEB_CONCURRENCY <= 1:
+        return []
+
+    aliases = ['default']
+
+    if settings.TOKEN_CACHE_ALIAS not in ('', None, 'default'):
+        aliases.append(settings.TOKEN_CACHE_ALIAS)
+
+    warnings = [
+        Warning(
+            f"The '{alias}' cache is local to each of the "
+            f'{settings.WEB_CONCURRENCY} worker processes.',
+            hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache, '
+                 'like memcached.',
+            id='core.W001'
+        )
+        for alias in aliases
+        if isinstance(caches[alias], LocMemCache)
+    ]
+
+    if not settings.TOKEN_CACHE_ALIAS:
+        warnings.append(Warning(
+            'Auth tokens are cached in each of the '
+            f'{settings.WEB_CONCURRENCY} worker processes.',
+            hint='Set TOKEN_CACHE_ALIAS to a shared cache.',
+            id='core.W002'
+        ))
+
+    return warnings
@@ -0,0 +1,131 @@
+import functools
+
+import psycopg2.extras
+
+from django.db.backends.postgresql import base
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.utils.asyncio import async_unsafe
+
+from core.db.backends.postgresql.creation import DatabaseCreation
+from core.db.pool import ConnectionPool, get_pool
+
+
+def connect(conn_params, isolation_level):
+    """Opens a raw connection configured as the base backend does"""
+    connection = base.Database.connect(**conn_params)
+
+    if isolation_level is not None:
+        connection.set_session(isolation_level=isolation_level)
+
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection,
+        loads=lambda x: x
+    )
+
+    return connection
+
+
+def ping(connection):
+    """Tells whether a raw connection still answers"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend with connection health checks and optional pooling
+
+    CONN_HEALTH_CHECKS pings a reused connection before its first query in
+    each request, as Django does from 4.1. POOL, a dict of MAX_SIZE,
+    TIMEOUT and MAX_AGE, shares a bounded set of connections between the
+    threads of the process.
+    """
+    creation_class = DatabaseCreation
+    health_check_done = False
+    _pool = None
+
+    @property
+    def health_check_enabled(self):
+        """Tells whether reused connections are checked"""
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_pool(self, conn_params):
+        """Returns the pool for the connection parameters, if pooling"""
+        options = self.settings_dict.get('POOL')
+
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+
+        # Tests switch the database name, which must get its own pool
+        key = (self.alias, repr(sorted(conn_params.items())))
+
+        return get_pool(key, lambda: ConnectionPool(
+            functools.partial(
+                connect,
+                conn_params,
+                self.settings_dict['OPTIONS'].get('isolation_level')
+            ),
+            max_size=options['MAX_SIZE'],
+            timeout=options['TIMEOUT'],
+            max_age=options.get('MAX_AGE'),
+            check=ping if self.health_check_enabled else None
+        ))
+
+    def get_new_connection(self, conn_params):
+        """Opens a connection, or takes one from the pool"""
+        self._pool = self.get_pool(conn_params)
+
+        if self._pool is None:
+            return super().get_new_connection(conn_params)
+
+        connection = self._pool.acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+            connection.isolation_level
+        )
+
+        return connection
+
+    def _close(self):
+        """Closes the connection, or gives it back to the pool"""
+        if self._pool is None or self.connection is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # This wrapper keeps a reference, so it cannot be reused
+                self.connection.close()
+
+            self._pool.release(self.connection)
+
+    def connect(self):
+        """Connects, the new connection needing no health check"""
+        # Set first, connecting already goes through ensure_connection()
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        """Closes a broken or expired connection at the request boundaries"""
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Closes a reused connection which stopped working"""
+        if (
+            self.connection is None or
+            not self.health_check_enabled or
+            self.health_check_done
+        ):
+            return
+
+        if not self.is_usable():
+            self.close()
+
+        self.health_check_done = True
+
+    @async_unsafe
+    def ensure_connection(self):
+        """Checks a reused connection before connecting if needed"""
+        self.close_if_health_check_failed()
+        super().ensure_connection()
@@ -0,0 +1,12 @@
+from django.db.backends.postgresql import creation
+
+from core.db.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Test database handling aware of the connection pools"""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        """Closes the pooled connections, which would block the drop"""
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
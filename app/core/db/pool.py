@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """No connection became available within the acquire timeout"""
+
+
+class ConnectionPool:
+    """Thread safe pool of database connections
+
+    At most max_size connections are open at once. Connections older than
+    max_age are closed instead of being reused, and check, when given, is
+    called on an idle connection before handing it out again.
+    """
+
+    def __init__(self, connect, max_size, timeout, max_age=None, check=None):
+        self._connect = connect
+        self._check = check
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._born = {}
+        self.size = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.created = 0
+        self.recycled = 0
+        self.timeouts = 0
+
+    def acquire(self):
+        """Returns an idle connection, or a new one if the pool has room"""
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            connection = self._reserve(deadline)
+
+            if connection is None:
+                return self._create()
+
+            # Checked unlocked, as it may be a round trip to the server
+            if self._healthy(connection):
+                return connection
+
+            with self._condition:
+                self.in_use -= 1
+                self._discard(connection)
+                self._condition.notify()
+
+    def release(self, connection):
+        """Puts a connection back, closing it if it cannot be reused"""
+        try:
+            reusable = not connection.closed
+
+            if reusable and connection.get_transaction_status():
+                # Not idle, the previous user left a transaction open
+                connection.rollback()
+        except Exception:
+            reusable = False
+
+        with self._condition:
+            self.in_use -= 1
+
+            if reusable and not self._expired(connection):
+                self._idle.append(connection)
+            else:
+                self._discard(connection)
+
+            self._condition.notify()
+
+    def close(self):
+        """Closes the idle connections"""
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.popleft())
+
+    def stats(self):
+        """Returns the usage counters of the pool"""
+        with self._condition:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'created': self.created,
+                'recycled': self.recycled,
+                'timeouts': self.timeouts,
+            }
+
+    def _reserve(self, deadline):
+        """Takes an idle connection, or None after reserving a new one"""
+        with self._condition:
+            while True:
+                while self._idle:
+                    # The most recently used, the likeliest to be alive
+                    connection = self._idle.pop()
+
+                    if self._expired(connection):
+                        self._discard(connection)
+                    else:
+                        self.in_use += 1
+                        return connection
+
+                if self.size < self.max_size:
+                    self.size += 1
+                    self.in_use += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No connection available within {self.timeout}s '
+                        f'({self.max_size} in use)'
+                    )
+
+                self.waiting += 1
+
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+    def _create(self):
+        """Opens a connection in a slot already reserved"""
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._condition:
+                self.size -= 1
+                self.in_use -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._born[connection] = time.monotonic()
+            self.created += 1
+
+        return connection
+
+    def _healthy(self, connection):
+        """Tells whether an idle connection still works"""
+        if connection.closed:
+            return False
+
+        try:
+            return self._check is None or self._check(connection)
+        except Exception:
+            return False
+
+    def _expired(self, connection):
+        """Tells whether a connection outlived its maximum age"""
+        born = self._born.get(connection, time.monotonic())
+
+        return (
+            self.max_age is not None and
+            time.monotonic() - born >= self.max_age
+        )
+
+    def _discard(self, connection):
+        """Closes a connection for good, freeing its slot"""
+        self._born.pop(connection, None)
+        self.size -= 1
+        self.recycled += 1
+
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def get_pool(key, create):
+    """Returns the pool of this process for key, created on first use"""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = create()
+
+        return _pools[key]
+
+
+def pool_stats():
+    """Returns the usage counters of the pools of this process by alias"""
+    with _pools_lock:
+        pools = list(_pools.items())
+
+    return {alias: pool.stats() for (alias, _), pool in pools}
+
+
+def close_pools():
+    """Closes the idle connections of every pool of this process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.close()
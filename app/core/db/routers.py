@@ -0,0 +1,61 @@
+import contextlib
+import contextvars
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Database alias serving the reads of the current request, None for primary
+read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Sends the reads of the block to the primary database"""
+    token = read_alias.set(None)
+
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Routes the reads of safe requests to a read replica
+
+    The replica is chosen by ReplicaRoutingMiddleware for each request. Any
+    other read, and every write, goes to the primary database.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Returns the database of the instance, or the request replica"""
+        instance = hints.get('instance')
+
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads in a transaction must see its writes
+            return None
+
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        """Returns the primary database"""
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allows relations between the primary and its replicas"""
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Leaves the replicas to be migrated through replication"""
+        if db in settings.DATABASE_REPLICAS:
+            return False
+
+        return None
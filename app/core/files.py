@@ -0,0 +1,82 @@
+import hashlib
+import os
+import re
+
+from django.db import connection, transaction
+from django.db.models.fields.files import ImageField, ImageFieldFile
+
+
+# The SHA-256 of the content, then an optional rendition suffix
+CONTENT_ADDRESSED_RE = re.compile(r'(?P<digest>[0-9a-f]{64})(_\w+)?')
+
+
+def content_hash(content):
+    """Returns the SHA-256 of a file, reusing the one computed on upload"""
+    digest = getattr(content, 'sha256', None)
+
+    if digest is None:
+        hasher = hashlib.sha256()
+
+        for chunk in content.chunks():
+            hasher.update(chunk)
+
+        digest = hasher.hexdigest()
+
+    return digest
+
+
+def is_content_addressed(name):
+    """Tells whether a stored file is named by its content hash"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+
+    return CONTENT_ADDRESSED_RE.fullmatch(stem) is not None
+
+
+def lock_content(name):
+    """Serializes the writers and collectors of a stored file
+
+    The lock is held until the end of the outermost transaction, so a file
+    is never collected between being reused and being referenced.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(hashtext(%s))',
+                [name]
+            )
+
+
+class ContentAddressedImageFieldFile(ImageFieldFile):
+    """Stores each distinct content once, named by its hash"""
+
+    def save(self, name, content, save=True):
+        """Saves the content, unless a file already holds it"""
+        extension = os.path.splitext(name)[1].lower()
+        name = self.field.generate_filename(
+            self.instance,
+            content_hash(content) + extension
+        )
+
+        with transaction.atomic():
+            lock_content(name)
+
+            if not self.storage.exists(name):
+                name = self.storage.save(
+                    name,
+                    content,
+                    max_length=self.field.max_length
+                )
+
+        self.name = name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+
+class ContentAddressedImageField(ImageField):
+    """Image field deduplicating the stored files by content"""
+    attr_class = ContentAddressedImageFieldFile
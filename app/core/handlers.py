@@ -0,0 +1,69 @@
+import django
+from django.core.handlers import asgi
+
+from asgiref.sync import sync_to_async
+
+
+def next_part(parts):
+    """Returns the next part of a streaming response, None past the end"""
+    return next(parts, None)
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """ASGI handler reading streaming responses outside of the event loop
+
+    Django iterates streaming responses on the event loop, where the queries
+    of a generator raise SynchronousOnlyOperation and file reads block.
+    Each part is produced in the thread running the sync views instead, the
+    same one that closes the response and its database connection.
+    """
+
+    async def send_response(self, response, send):
+        """Sends the response, producing each streamed part in a thread"""
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        headers = [
+            (
+                header.encode('ascii') if isinstance(header, str) else header,
+                value.encode('latin1') if isinstance(value, str) else value
+            )
+            for header, value in response.items()
+        ]
+        headers += [
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        ]
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+
+        parts = iter(response)
+        read = sync_to_async(next_part, thread_sensitive=True)
+
+        try:
+            while True:
+                part = await read(parts)
+
+                if part is None:
+                    break
+
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+
+            await send({'type': 'http.response.body'})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+    """Sets Django up and returns the ASGI application"""
+    django.setup(set_prefix=False)
+
+    return ASGIHandler()
@@ -0,0 +1,298 @@
+import csv
+import hashlib
+import io
+import itertools
+import json
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.cache import LRUCache
+from core.models import Tag, Ingredient, Recipe, RecipeImport
+
+from recipe.cache import bump_generation
+
+
+RELATED_MODELS = {'tags': Tag, 'ingredients': Ingredient}
+
+# Length of the names and texts stored, longer values are truncated
+MAX_LENGTH = 255
+
+
+class Command(BaseCommand):
+    """Django command to stream recipes from a file into the database"""
+    help = (
+        'Imports recipes for a user from a JSONL or CSV file. Records have '
+        'title, time_minutes, price, link, tags and ingredients, the last '
+        "two being lists of names (separated by '|' in CSV files). Records "
+        'are loaded in chunks committed one by one with the progress of '
+        'the import, so an interrupted import of the same file can continue '
+        'with --resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Owner email')
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument(
+            '--method',
+            choices=('copy', 'orm'),
+            help='Defaults to copy on PostgreSQL and orm elsewhere'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip the records already imported by a previous run'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            self.user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        method = options['method'] or (
+            'copy' if connection.vendor == 'postgresql' else 'orm'
+        )
+        digest = self.file_digest(path)
+        imported = self.read_progress(digest) if options['resume'] else 0
+
+        self.related_ids = {
+            field_name: LRUCache(max_size=100000, ttl=3600)
+            for field_name in RELATED_MODELS
+        }
+        load = self.copy_chunk if method == 'copy' else self.orm_chunk
+        start = time.monotonic()
+        total = 0
+
+        with open(path, newline='') as file:
+            records = self.read_records(file, file_format)
+            records = itertools.islice(records, imported, None)
+
+            while True:
+                chunk = list(itertools.islice(records, options['chunk_size']))
+
+                if not chunk:
+                    break
+
+                with transaction.atomic():
+                    self.resolve_related(chunk)
+                    recipe_ids = load(chunk)
+                    self.count_related(chunk, recipe_ids)
+                    Recipe.objects.filter(
+                        pk__in=recipe_ids
+                    ).update_search_vector()
+
+                    imported += len(chunk)
+                    # Committed with the chunk, never ahead or behind it
+                    self.write_progress(digest, imported)
+
+                total += len(chunk)
+
+                rate = total / max(time.monotonic() - start, 1e-6)
+                self.stdout.write(
+                    f'Imported {imported} recipes ({rate:.0f} recipes/s)'
+                )
+
+        # Bulk loads send no model signals
+        bump_generation(self.user.pk)
+
+        RecipeImport.objects.filter(user=self.user, digest=digest).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Import finished, {total} recipes imported'
+        ))
+
+    def file_digest(self, path):
+        """Returns the SHA-256 of a file, identifying it across runs"""
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(2 ** 20), b''):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def read_progress(self, digest):
+        """Returns how many records of a file a previous run imported"""
+        return RecipeImport.objects.filter(
+            user=self.user,
+            digest=digest
+        ).values_list('imported', flat=True).first() or 0
+
+    def write_progress(self, digest, imported):
+        """Records how many records of a file are imported"""
+        RecipeImport.objects.update_or_create(
+            user=self.user,
+            digest=digest,
+            defaults={'imported': imported}
+        )
+
+    def read_records(self, file, file_format):
+        """Yields the validated records of the file one by one"""
+        if file_format == 'csv':
+            rows = (
+                dict(row, **{
+                    field_name: [
+                        name for name in (row.get(field_name) or '').split('|')
+                        if name
+                    ]
+                    for field_name in RELATED_MODELS
+                })
+                for row in csv.DictReader(file)
+            )
+        else:
+            rows = (json.loads(line) for line in file if line.strip())
+
+        for number, row in enumerate(rows, start=1):
+            try:
+                yield {
+                    'title': str(row['title'])[:MAX_LENGTH],
+                    'time_minutes': int(row['time_minutes']),
+                    'price': Decimal(str(row['price'])).quantize(
+                        Decimal('0.01')
+                    ),
+                    'link': str(row.get('link') or '')[:MAX_LENGTH],
+                    **{
+                        field_name: [
+                            str(name)[:MAX_LENGTH]
+                            for name in row.get(field_name) or []
+                        ]
+                        for field_name in RELATED_MODELS
+                    },
+                }
+            except (KeyError, TypeError, ValueError, InvalidOperation) as e:
+                raise CommandError(f'Invalid record {number}: {e!r}')
+
+    def resolve_related(self, chunk):
+        """Maps the tag and ingredient names to IDs, creating missing ones"""
+        for field_name, model in RELATED_MODELS.items():
+            known = self.related_ids[field_name]
+            names = {
+                name for record in chunk for name in record[field_name]
+                if known.get(name) is None
+            }
+
+            if not names:
+                continue
+
+            model.objects.bulk_create(
+                (model(user=self.user, name=name) for name in names),
+                ignore_conflicts=True
+            )
+
+            for name, pk in model.objects.filter(
+                user=self.user,
+                name__in=names
+            ).values_list('name', 'id'):
+                known.set(name, pk)
+
+    def relations(self, chunk, recipe_ids, field_name):
+        """Yields the (recipe ID, related ID) pairs of a relation"""
+        known = self.related_ids[field_name]
+
+        for recipe_id, record in zip(recipe_ids, chunk):
+            for name in dict.fromkeys(record[field_name]):
+                yield recipe_id, known.get(name)
+
+    def count_related(self, chunk, recipe_ids):
+        """Counts the loaded recipes on their tags and ingredients"""
+        for field_name, model in RELATED_MODELS.items():
+            model.objects.add_recipe_counts(Counter(
+                pk for _, pk in self.relations(chunk, recipe_ids, field_name)
+            ))
+
+    def copy_chunk(self, chunk):
+        """Loads a chunk through PostgreSQL COPY, returning the recipe IDs"""
+        updated_at = timezone.now().isoformat()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('core_recipe', 'id')) "
+                'FROM generate_series(1, %s)',
+                [len(chunk)]
+            )
+            recipe_ids = [row[0] for row in cursor.fetchall()]
+
+            self.copy(cursor, Recipe._meta.db_table, (
+                'id', 'user_id', 'title', 'time_minutes', 'price', 'link',
+                'image_renditions', 'updated_at'
+            ), (
+                (
+                    recipe_id, self.user.pk, record['title'],
+                    record['time_minutes'], record['price'], record['link'],
+                    '{}', updated_at
+                )
+                for recipe_id, record in zip(recipe_ids, chunk)
+            ))
+
+            for field_name in RELATED_MODELS:
+                field = Recipe._meta.get_field(field_name)
+
+                self.copy(
+                    cursor,
+                    field.m2m_db_table(),
+                    (field.m2m_column_name(), field.m2m_reverse_name()),
+                    self.relations(chunk, recipe_ids, field_name)
+                )
+
+        return recipe_ids
+
+    def copy(self, cursor, table, columns, rows):
+        """Streams rows into a table with COPY ... FROM STDIN"""
+        buffer = io.StringIO()
+        # Quoted empty values are empty strings to COPY, never NULL
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+        buffer.seek(0)
+
+        cursor.copy_expert(
+            f'COPY {table} ({", ".join(columns)}) '
+            'FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+    def orm_chunk(self, chunk):
+        """Loads a chunk with bulk_create, returning the recipe IDs"""
+        recipes = [
+            Recipe(
+                user=self.user,
+                **{
+                    key: value for key, value in record.items()
+                    if key not in RELATED_MODELS
+                }
+            )
+            for record in chunk
+        ]
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+
+        recipe_ids = [recipe.pk for recipe in recipes]
+
+        for field_name, model in RELATED_MODELS.items():
+            through = getattr(Recipe, field_name).through
+            related_field = f'{model._meta.model_name}_id'
+
+            through.objects.bulk_create(
+                through(recipe_id=recipe_id, **{related_field: pk})
+                for recipe_id, pk in self.relations(
+                    chunk,
+                    recipe_ids,
+                    field_name
+                )
+            )
+
+        return recipe_ids
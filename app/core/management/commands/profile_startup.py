@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Boots api.wsgi in a fresh interpreter, timing each stage
+BOOT_SCRIPT = '''
+import json, sys, time
+
+stages = {}
+start = time.perf_counter()
+import django
+django.setup()
+stages['settings and apps'] = time.perf_counter() - start
+
+start = time.perf_counter()
+import api.wsgi
+stages['WSGI application'] = time.perf_counter() - start
+
+if sys.argv[1] == 'warmup':
+    from core.warmup import warmup
+    stages.update(warmup())
+
+print(json.dumps(stages))
+'''
+
+# A line of `python -X importtime`, times in microseconds
+IMPORT_TIME_RE = re.compile(
+    r'^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| '
+    r'\s*(?P<module>\S+)$'
+)
+
+
+class Command(BaseCommand):
+    """Django command to report where the boot time of a worker goes"""
+    help = 'Reports the startup stages and module imports of api.wsgi'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Number of modules and packages to list'
+        )
+        parser.add_argument(
+            '--sort',
+            choices=('cumulative', 'self'),
+            default='cumulative',
+            help='Import time to rank the modules by'
+        )
+        parser.add_argument(
+            '--skip-warmup',
+            action='store_true',
+            help='Leave out the warm-up steps'
+        )
+
+    def boot(self, warmup):
+        """Boots the application in a subprocess, returning its output"""
+        start = time.perf_counter()
+        process = subprocess.run(
+            [
+                sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT,
+                'warmup' if warmup else 'skip'
+            ],
+            # Warm-up is timed by the script, not as part of the import
+            env={**os.environ, 'WARMUP': '0'},
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True
+        )
+        elapsed = time.perf_counter() - start
+
+        if process.returncode:
+            raise CommandError(
+                f'api.wsgi failed to boot:\n{process.stderr[-2000:]}'
+            )
+
+        stages = json.loads(process.stdout.strip().splitlines()[-1])
+
+        return elapsed, stages, process.stderr
+
+    def parse_imports(self, output):
+        """Returns the (module, self, cumulative) import times in seconds"""
+        imports = []
+
+        for line in output.splitlines():
+            match = IMPORT_TIME_RE.match(line)
+
+            if match:
+                imports.append((
+                    match['module'],
+                    int(match['self']) / 1e6,
+                    int(match['cumulative']) / 1e6
+                ))
+
+        return imports
+
+    def handle(self, *args, **options):
+        elapsed, stages, output = self.boot(not options['skip_warmup'])
+        imports = self.parse_imports(output)
+        top = options['top']
+
+        self.stdout.write(f'Startup of api.wsgi: {elapsed * 1000:.1f} ms')
+        self.stdout.write(
+            f'  {"interpreter and other":<24}'
+            f'{(elapsed - sum(stages.values())) * 1000:10.1f} ms'
+        )
+
+        for stage, seconds in stages.items():
+            self.stdout.write(f'  {stage:<24}{seconds * 1000:10.1f} ms')
+
+        packages = defaultdict(float)
+
+        for module, own, _ in imports:
+            packages[module.partition('.')[0]] += own
+
+        self.stdout.write('\nSlowest packages (total of own import time):')
+
+        for package, seconds in sorted(
+            packages.items(),
+            key=lambda item: item[1],
+            reverse=True
+        )[:top]:
+            self.stdout.write(f'  {seconds * 1000:10.1f} ms  {package}')
+
+        column = 2 if options['sort'] == 'cumulative' else 1
+        self.stdout.write(
+            f'\nSlowest modules ({options["sort"]} import time of '
+            f'{len(imports)}):'
+        )
+
+        for entry in sorted(
+            imports,
+            key=lambda entry: entry[column],
+            reverse=True
+        )[:top]:
+            self.stdout.write(f'  {entry[column] * 1000:10.1f} ms  {entry[0]}')
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Tag, Ingredient, count_recipes
+
+from recipe.cache import bump_generation
+
+
+class Command(BaseCommand):
+    """Django command to recompute the recipe counts of tags and ingredients"""
+    help = 'Recounts the recipes using each tag and ingredient'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Objects recounted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = set()
+
+        for model in (Tag, Ingredient):
+            pks = list(model.objects.order_by('pk').values_list(
+                'pk',
+                flat=True
+            ))
+            fixed = 0
+
+            # One transaction per batch, which keeps the rows locked briefly
+            for start in range(0, len(pks), batch_size):
+                with transaction.atomic():
+                    drifted = list(model.objects.filter(
+                        pk__in=pks[start:start + batch_size]
+                    ).annotate(
+                        actual=count_recipes(model)
+                    ).exclude(
+                        recipe_count=F('actual')
+                    ).select_for_update().values_list('pk', 'user_id'))
+
+                    if not drifted:
+                        continue
+
+                    fixed += model.objects.filter(
+                        pk__in=[pk for pk, _ in drifted]
+                    ).update_recipe_count()
+                    user_ids.update(user_id for _, user_id in drifted)
+
+            self.stdout.write(
+                f'Recounted {len(pks)} {model._meta.verbose_name_plural}, '
+                f'{fixed} were off'
+            )
+
+        # Updates send no model signals, the cached lists are ordered by count
+        for user_id in sorted(user_ids):
+            bump_generation(user_id)
@@ -1,23 +1,117 @@
+import random
 import time
+from itertools import count
 
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+
+# Delay before the first retry, doubled by every further attempt
+BASE_DELAY = 0.1
+
+
+class NotReady(Exception):
+    """A service answered but cannot serve requests yet"""
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
+    help = 'Waits until the databases, and optionally the caches, are ready'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait before giving up'
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=5,
+            help='Longest pause in seconds between two attempts'
+        )
+        parser.add_argument(
+            '--migrations',
+            action='store_true',
+            help='Also wait until every migration is applied'
+        )
+        parser.add_argument(
+            '--caches',
+            action='store_true',
+            help='Also wait until every cache answers'
+        )
+
+    def check_databases(self):
+        """Runs a query on every database"""
+        for alias in connections:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+    def check_migrations(self):
+        """Fails while the default database has unapplied migrations"""
+        executor = MigrationExecutor(connections['default'])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+        if plan:
+            raise NotReady(f'{len(plan)} migrations not applied')
+
+    def check_caches(self):
+        """Fails unless every cache stores and returns a value"""
+        for alias in caches:
+            key = f'wait_for_db:{random.getrandbits(64):x}'
+
+            try:
+                caches[alias].set(key, True, 10)
+                answered = caches[alias].get(key)
+                caches[alias].delete(key)
+            except Exception as error:
+                raise NotReady(f'Cache {alias} unavailable ({error})')
+
+            if not answered:
+                raise NotReady(f'Cache {alias} unavailable')
 
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
-        db_conn = None
+        deadline = time.monotonic() + options['timeout']
+        checks = [self.check_databases]
+
+        if options['migrations']:
+            checks.append(self.check_migrations)
+
+        if options['caches']:
+            checks.append(self.check_caches)
 
-        while not db_conn:
+        for attempt in count():
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, sleeping 1 second...')
-                time.sleep(1)
+                for check in checks:
+                    check()
+                break
+            except (OperationalError, NotReady) as error:
+                if isinstance(error, NotReady):
+                    reason = str(error)
+                else:
+                    reason = 'Database unavailable'
+
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    raise CommandError(
+                        f'{reason} after {options["timeout"]} seconds'
+                    )
+
+                # Exponential backoff, with jitter so that instances booting
+                # together do not retry in lockstep
+                delay = min(
+                    options['max_delay'],
+                    BASE_DELAY * 2 ** min(attempt, 32)
+                )
+                delay = min(random.uniform(delay / 2, delay), remaining)
+
+                self.stdout.write(f'{reason}, retrying in {delay:.2f}s...')
+                time.sleep(delay)
 
-        time.sleep(3)
         self.stdout.write(self.style.SUCCESS('Database available!'))
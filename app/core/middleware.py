@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import random
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.db.routers import read_alias
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """Picks the database serving the reads of each request
+
+    Safe requests read from a random replica. A client sending a write is
+    pinned to the primary for DB_REPLICA_PIN_SECONDS afterwards, so its
+    next reads see the write despite the replication lag.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            # Marks the instance as a coroutine function, as Django does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = read_alias.set(self.choose_alias(request))
+
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+
+        self.pin_writer(request)
+
+        return response
+
+    async def __acall__(self, request):
+        token = read_alias.set(
+            await sync_to_async(self.choose_alias)(request)
+        )
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_alias.reset(token)
+
+        await sync_to_async(self.pin_writer)(request)
+
+        return response
+
+    def pin_key(self, request):
+        """Returns the cache key pinning the client, None if anonymous"""
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+
+        if not authorization:
+            return None
+
+        digest = hashlib.sha256(authorization.encode()).hexdigest()
+
+        return f'db:pin:{digest}'
+
+    def choose_alias(self, request):
+        """Returns the replica for the reads of request, None for primary"""
+        if (
+            not settings.DATABASE_REPLICAS or
+            request.method not in SAFE_METHODS
+        ):
+            return None
+
+        key = self.pin_key(request)
+
+        if key is not None and cache.get(key):
+            return None
+
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def pin_writer(self, request):
+        """Pins the client of a write to the primary for a while"""
+        if (
+            not settings.DATABASE_REPLICAS or
+            request.method in SAFE_METHODS
+        ):
+            return
+
+        key = self.pin_key(request)
+
+        if key is not None:
+            cache.set(key, True, settings.DB_REPLICA_PIN_SECONDS)
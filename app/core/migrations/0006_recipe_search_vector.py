@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+BACKFILL_SEARCH_VECTOR = """
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector('english', title), 'A') ||
+    setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(core_tag.name, ' ')
+        FROM core_tag
+        JOIN core_recipe_tags ON core_recipe_tags.tag_id = core_tag.id
+        WHERE core_recipe_tags.recipe_id = core_recipe.id
+    ), '') || ' ' || coalesce((
+        SELECT string_agg(core_ingredient.name, ' ')
+        FROM core_ingredient
+        JOIN core_recipe_ingredients
+            ON core_recipe_ingredients.ingredient_id = core_ingredient.id
+        WHERE core_recipe_ingredients.recipe_id = core_recipe.id
+    ), '')), 'B');
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_recipe_search__c01407_gin'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
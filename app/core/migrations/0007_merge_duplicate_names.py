@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:56
+
+from django.db import migrations
+
+
+def merge_duplicate_names(model):
+    """SQL merging the objects of a user sharing the same name
+
+    The oldest object is kept and takes over the recipes of the others.
+    """
+    return f"""
+        INSERT INTO core_recipe_{model}s (recipe_id, {model}_id)
+        SELECT through.recipe_id, keep.id
+        FROM core_recipe_{model}s through
+        JOIN core_{model} dup ON dup.id = through.{model}_id
+        JOIN core_{model} keep ON keep.user_id = dup.user_id
+            AND keep.name = dup.name
+            AND keep.id < dup.id
+        ON CONFLICT DO NOTHING;
+
+        DELETE FROM core_recipe_{model}s through
+        USING core_{model} dup, core_{model} keep
+        WHERE through.{model}_id = dup.id
+            AND keep.user_id = dup.user_id
+            AND keep.name = dup.name
+            AND keep.id < dup.id;
+
+        DELETE FROM core_{model} dup
+        USING core_{model} keep
+        WHERE keep.user_id = dup.user_id
+            AND keep.name = dup.name
+            AND keep.id < dup.id;
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(merge_duplicate_names('tag'), migrations.RunSQL.noop),
+        migrations.RunSQL(
+            merge_duplicate_names('ingredient'),
+            migrations.RunSQL.noop
+        ),
+    ]
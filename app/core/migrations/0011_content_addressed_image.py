@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:15
+
+import core.files
+import core.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=core.files.ContentAddressedImageField(null=True, upload_to=core.models.recipe_image_file_path),
+        ),
+    ]
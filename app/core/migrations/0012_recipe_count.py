@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:45
+
+from django.db import migrations, models
+
+
+def backfill_recipe_count(model):
+    """Counts the recipes using each tag or ingredient"""
+    return migrations.RunSQL(
+        f'UPDATE core_{model} SET recipe_count = ('
+        f'SELECT count(*) FROM core_recipe_{model}s '
+        f'WHERE core_recipe_{model}s.{model}_id = core_{model}.id);',
+        migrations.RunSQL.noop
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_content_addressed_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-recipe_count', 'id'], name='ingredient_user_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-recipe_count', 'id'], name='tag_user_count_idx'),
+        ),
+        backfill_recipe_count('tag'),
+        backfill_recipe_count('ingredient'),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+
+def name_prefix_index(model):
+    """Index to match and sort the case-insensitive names of a user
+
+    In the C collation the index answers prefix patterns and returns the
+    matches in order, so a limited scan stops at the first rows.
+    """
+    return migrations.RunSQL(
+        f'CREATE INDEX core_{model}_user_name_prefix_idx '
+        f'ON core_{model} (user_id, (UPPER(name::text) COLLATE "C"));',
+        f'DROP INDEX core_{model}_user_name_prefix_idx;'
+    )
+
+
+# pg_trgm ships with the contrib modules, which some servers lack. Names
+# are then only matched by prefix.
+TRIGRAM_INDEXES = """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'
+    ) THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX core_tag_name_trgm_idx
+            ON core_tag USING gin (name gin_trgm_ops);
+        CREATE INDEX core_ingredient_name_trgm_idx
+            ON core_ingredient USING gin (name gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+
+DROP_TRIGRAM_INDEXES = """
+DROP INDEX IF EXISTS core_tag_name_trgm_idx;
+DROP INDEX IF EXISTS core_ingredient_name_trgm_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_recipe_count'),
+    ]
+
+    operations = [
+        name_prefix_index('tag'),
+        name_prefix_index('ingredient'),
+        migrations.RunSQL(TRIGRAM_INDEXES, DROP_TRIGRAM_INDEXES),
+    ]
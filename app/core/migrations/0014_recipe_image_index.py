@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_name_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('image__gt', '')), fields=['image'], name='recipe_image_idx'),
+        ),
+    ]
@@ -2,16 +2,31 @@ import uuid
 import os
 
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.conf import settings
 
+from core.files import CONTENT_ADDRESSED_RE, ContentAddressedImageField
+
+
+SEARCH_CONFIG = 'english'
+
 
 def recipe_image_file_path(instance, filename):
-    """Generates a filepath for new recipe image"""
+    """Generates a filepath for new recipe image
+
+    Files already named by their content hash keep their name, so that
+    identical images share one file.
+    """
     ext = filename.split('.')[-1]
 
-    filename = f'{uuid.uuid4()}.{ext}'
+    if not CONTENT_ADDRESSED_RE.fullmatch(filename.split('.')[0]):
+        filename = f'{uuid.uuid4()}.{ext}'
 
     return os.path.join('uploads/recipe/', filename)
 
@@ -53,13 +68,63 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+def count_recipes(model):
+    """Returns the number of recipes using a tag or ingredient"""
+    relation = model._meta.get_field('recipe')
+    column = relation.field.m2m_reverse_field_name()
+    counts = relation.through.objects.filter(
+        **{column: OuterRef('pk')}
+    ).order_by().values(column).annotate(count=Count('*')).values('count')
+
+    return Coalesce(Subquery(counts), 0)
+
+
+class RecipeCountQuerySet(models.QuerySet):
+
+    def add_recipe_counts(self, deltas):
+        """Adds to the recipe count of each primary key its delta"""
+        by_delta = {}
+
+        for pk, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(pk)
+
+        for delta, pks in by_delta.items():
+            self.filter(pk__in=sorted(pks)).update(
+                recipe_count=F('recipe_count') + delta
+            )
+
+    def update_recipe_count(self):
+        """Recounts the recipes using each object"""
+        return self.update(recipe_count=count_recipes(self.model))
+
+
 class Tag(models.Model):
     """Tag to be used for a recipe"""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecipeCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-recipe_count', 'id'],
+                name='tag_user_count_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -70,18 +135,64 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecipeCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-recipe_count', 'id'],
+                name='ingredient_user_count_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+def related_names(model):
+    """Returns the names of the objects related to a recipe as one string"""
+    names = model.objects.filter(
+        recipe=OuterRef('pk')
+    ).values('recipe').annotate(
+        names=StringAgg('name', ' ')
+    ).values('names')
+
+    return Coalesce(Subquery(names), Value(''))
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def update_search_vector(self, **fields):
+        """Recomputes the full text search vector, updating any fields too"""
+        return self.update(**fields, search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+            SearchVector(
+                related_names(Tag),
+                related_names(Ingredient),
+                weight='B',
+                config=SEARCH_CONFIG
+            )
+        ))
+
+
 class Recipe(models.Model):
     """Recipe objects"""
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     title = models.CharField(max_length=255)
     time_minutes = models.IntegerField()
@@ -89,7 +200,50 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = ContentAddressedImageField(
+        null=True,
+        upload_to=recipe_image_file_path
+    )
+    image_renditions = models.JSONField(default=dict, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+            GinIndex(fields=['search_vector']),
+            # Finds whether a shared image is still used, most have none
+            models.Index(
+                fields=['image'],
+                name='recipe_image_idx',
+                condition=Q(image__gt='')
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeImport(models.Model):
+    """Progress of an import of a file's recipes for a user"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    digest = models.CharField(max_length=64)
+    imported = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'digest'],
+                name='unique_import_per_user'
+            )
+        ]
+
+    def __str__(self):
+        return self.digest
@@ -0,0 +1,125 @@
+from collections import Counter
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe
+
+
+# The tag or ingredient model counted by each recipe through table
+COUNTED_MODELS = {
+    Recipe.tags.through: Tag,
+    Recipe.ingredients.through: Ingredient,
+}
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    """Indexes the recipe title for full text search"""
+    Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_related_search_vector(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    """Indexes and touches the recipes whose tags or ingredients changed"""
+    if action == 'pre_clear' and reverse:
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == 'post_clear':
+        recipe_ids = instance.__dict__.pop('_cleared_recipe_ids', [])
+    else:
+        recipe_ids = pk_set
+
+    Recipe.objects.filter(pk__in=recipe_ids).update_search_vector(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_renamed_search_vector(sender, instance, created, **kwargs):
+    """Indexes and touches the recipes of a renamed tag or ingredient"""
+    if not created:
+        instance.recipe_set.all().update_search_vector(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_deleted_recipe_ids(sender, instance, **kwargs):
+    """Remembers the recipes of a tag or ingredient about to be deleted"""
+    instance._deleted_recipe_ids = list(
+        instance.recipe_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_deleted_search_vector(sender, instance, **kwargs):
+    """Indexes and touches the recipes of a deleted tag or ingredient"""
+    Recipe.objects.filter(
+        pk__in=instance.__dict__.pop('_deleted_recipe_ids', [])
+    ).update_search_vector(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Counts the recipes added to or removed from tags and ingredients"""
+    model = COUNTED_MODELS[sender]
+    column = f'{model._meta.model_name}_id'
+    stash = f'_removed_{column}s'
+
+    if action in ('pre_remove', 'pre_clear'):
+        # Only the existing relations are removed, pk_set may hold others
+        rows = sender.objects.filter(
+            **{column if reverse else 'recipe_id': instance.pk}
+        )
+
+        if action == 'pre_remove':
+            rows = rows.filter(
+                **{f'{"recipe_id" if reverse else column}__in': pk_set}
+            )
+
+        instance.__dict__[stash] = Counter(
+            rows.values_list(column, flat=True)
+        )
+    elif action == 'post_add':
+        if reverse:
+            deltas = {instance.pk: len(pk_set)}
+        else:
+            deltas = dict.fromkeys(pk_set, 1)
+
+        model.objects.add_recipe_counts(deltas)
+    elif action in ('post_remove', 'post_clear'):
+        removed = instance.__dict__.pop(stash, Counter())
+        model.objects.add_recipe_counts({
+            pk: -count for pk, count in removed.items()
+        })
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, **kwargs):
+    """Uncounts a recipe about to be deleted from its tags and ingredients"""
+    for through, model in COUNTED_MODELS.items():
+        model.objects.add_recipe_counts(dict.fromkeys(
+            through.objects.filter(recipe_id=instance.pk).values_list(
+                f'{model._meta.model_name}_id',
+                flat=True
+            ),
+            -1
+        ))
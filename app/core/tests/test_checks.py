@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_caches
+
+
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
+
+
+class SharedCachesCheckTests(SimpleTestCase):
+    """Tests the check of the caches shared by the workers"""
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_local_cache_with_workers(self):
+        """should warn about a local memory cache under several workers"""
+        warnings = check_shared_caches(None)
+
+        self.assertEqual([warning.id for warning in warnings], ['core.W001'])
+
+    @override_settings(WEB_CONCURRENCY=4, TOKEN_CACHE_ALIAS='')
+    def test_local_token_cache_with_workers(self):
+        """should warn about tokens cached in each worker"""
+        warnings = check_shared_caches(None)
+
+        self.assertIn('core.W002', [warning.id for warning in warnings])
+
+    @override_settings(WEB_CONCURRENCY=4, CACHES=SHARED_CACHES)
+    def test_shared_cache_with_workers(self):
+        """should accept a shared cache under several workers"""
+        self.assertEqual(check_shared_caches(None), [])
+
+    @override_settings(WEB_CONCURRENCY=1, TOKEN_CACHE_ALIAS='')
+    def test_local_cache_single_worker(self):
+        """should accept local caches in a single worker"""
+        self.assertEqual(check_shared_caches(None), [])
@@ -1,8 +1,23 @@
-from unittest.mock import patch
+import hashlib
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe, RecipeImport
+
+
+TAGS_URL = reverse('recipe:tag-list')
 
 
 class CommandTests(TestCase):
@@ -11,17 +26,336 @@ class CommandTests(TestCase):
         """should pass for when db is ready"""
 
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
+            gi.return_value = MagicMock()
+            call_command('wait_for_db', stdout=StringIO())
 
             self.assertEqual(gi.call_count, 1)
+            gi.return_value.cursor().__enter__().execute.assert_called_with(
+                'SELECT 1'
+            )
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db_(self, ts):
         """should pass for waiting db for 5 retries"""
 
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
+            gi.side_effect = [OperationalError] * 5 + [MagicMock()]
+            call_command('wait_for_db', stdout=StringIO())
 
             self.assertEqual(gi.call_count, 6)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_backoff(self, ts):
+        """should wait exponentially longer between retries, up to a cap"""
+
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.side_effect = [OperationalError] * 8 + [MagicMock()]
+            call_command('wait_for_db', '--max-delay', '1', stdout=StringIO())
+
+        delays = [call.args[0] for call in ts.call_args_list]
+
+        self.assertEqual(len(delays), 8)
+        self.assertTrue(0.05 <= delays[0] <= 0.1)
+        self.assertTrue(0.4 <= delays[3] <= 0.8)
+        self.assertTrue(all(0.5 <= delay <= 1 for delay in delays[4:]))
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """should fail once the database stayed unavailable too long"""
+
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.side_effect = OperationalError
+
+            with self.assertRaises(CommandError):
+                call_command(
+                    'wait_for_db',
+                    '--timeout', '0',
+                    stdout=StringIO()
+                )
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_migrations(self, ts):
+        """should wait until every migration is applied"""
+        plans = [[('core', '0001_initial')], []]
+
+        with patch(
+            'core.management.commands.wait_for_db.MigrationExecutor'
+        ) as executor:
+            executor.return_value.migration_plan.side_effect = plans
+            call_command('wait_for_db', '--migrations', stdout=StringIO())
+
+        self.assertEqual(ts.call_count, 1)
+
+    def test_wait_for_db_caches(self):
+        """should check every cache answers"""
+        out = StringIO()
+
+        call_command('wait_for_db', '--caches', stdout=out)
+
+        self.assertIn('Database available!', out.getvalue())
+
+
+class ProfileStartupCommandTests(TestCase):
+
+    def test_profile_startup(self):
+        """should report the boot stages and slowest imports"""
+        out = StringIO()
+
+        call_command(
+            'profile_startup',
+            '--skip-warmup',
+            '--top', '3',
+            stdout=out
+        )
+
+        report = out.getvalue()
+
+        self.assertIn('settings and apps', report)
+        self.assertIn('WSGI application', report)
+        self.assertNotIn('warm_urls', report)
+        self.assertIn('django', report.split('Slowest packages')[1])
+
+
+class UpdateRecipeCountsCommandTests(TestCase):
+
+    def test_update_recipe_counts(self):
+        """should fix the recipe counts which drifted"""
+        user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        tag = Tag.objects.create(user=user, name="Vegan")
+        ingredient = Ingredient.objects.create(user=user, name="Salt")
+        recipe = Recipe.objects.create(
+            user=user,
+            title="Salad",
+            time_minutes=5,
+            price=3
+        )
+        recipe.tags.add(tag)
+        Tag.objects.update(recipe_count=7)
+        Ingredient.objects.update(recipe_count=2)
+        out = StringIO()
+
+        call_command('update_recipe_counts', '--batch-size', '1', stdout=out)
+
+        tag.refresh_from_db()
+        ingredient.refresh_from_db()
+
+        self.assertEqual(tag.recipe_count, 1)
+        self.assertEqual(ingredient.recipe_count, 0)
+        self.assertIn('Recounted 1 tags, 1 were off', out.getvalue())
+
+    def test_update_recipe_counts_invalidates_lists(self):
+        """should refresh the cached lists ordered by the fixed counts"""
+        user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        popular, rare = (
+            Tag.objects.create(user=user, name=name)
+            for name in ("Popular", "Rare")
+        )
+        Recipe.objects.create(
+            user=user,
+            title="Salad",
+            time_minutes=5,
+            price=3
+        ).tags.add(popular)
+        client = APIClient()
+        client.force_authenticate(user)
+        params = {'ordering': '-recipe_count'}
+
+        Tag.objects.filter(pk=rare.pk).update(recipe_count=5)
+        cached = client.get(TAGS_URL, params)
+
+        call_command('update_recipe_counts', stdout=StringIO())
+        res = client.get(
+            TAGS_URL,
+            params,
+            HTTP_IF_NONE_MATCH=cached['ETag']
+        )
+
+        self.assertEqual(
+            [tag['name'] for tag in cached.data['results']],
+            ["Rare", "Popular"]
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], cached['ETag'])
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ["Popular", "Rare"]
+        )
+
+
+class ImportRecipesCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.dir = tempfile.TemporaryDirectory()
+        self.records = [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10 + i,
+                "price": "12.50",
+                "tags": ["Vegan", f"Tag {i}"],
+                "ingredients": ["Salt"]
+            }
+            for i in range(5)
+        ]
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write_file(self, name, content):
+        """Writes a file to import and returns its path"""
+        path = os.path.join(self.dir.name, name)
+
+        with open(path, 'w') as file:
+            file.write(content)
+
+        return path
+
+    def write_jsonl(self, records):
+        """Writes the records to a JSONL file and returns its path"""
+        return self.write_file(
+            'recipes.jsonl',
+            '\n'.join(json.dumps(record) for record in records)
+        )
+
+    def import_recipes(self, path, *args):
+        """Runs the import for the test user"""
+        call_command(
+            'import_recipes',
+            path,
+            '--user', self.user.email,
+            *args,
+            stdout=StringIO()
+        )
+
+    def test_import_jsonl_with_copy(self):
+        """should import the recipes reusing the existing tags"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        path = self.write_jsonl(self.records)
+
+        self.import_recipes(path, '--chunk-size', '2', '--method', 'copy')
+
+        recipes = Recipe.objects.filter(user=self.user)
+
+        self.assertEqual(recipes.count(), 5)
+        self.assertEqual(tag.recipe_set.count(), 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 6)
+        self.assertEqual(
+            Ingredient.objects.get(user=self.user).recipe_set.count(),
+            5
+        )
+        self.assertTrue(recipes.filter(search_vector='vegan').exists())
+        self.assertFalse(RecipeImport.objects.exists())
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 5)
+
+    def test_import_csv_with_orm(self):
+        """should import the recipes from a CSV file"""
+        path = self.write_file(
+            'recipes.csv',
+            'title,time_minutes,price,link,tags,ingredients\n'
+            'Pancakes,20,5.00,,Breakfast|Sweet,Flour|Milk|Eggs\n'
+        )
+
+        self.import_recipes(path, '--method', 'orm')
+
+        recipe = Recipe.objects.get(user=self.user)
+
+        self.assertEqual(recipe.title, "Pancakes")
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(recipe.ingredients.count(), 3)
+
+    def digest(self, path):
+        """Returns the SHA-256 of a file"""
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+    def test_import_resume(self):
+        """should skip the records imported before an interruption"""
+        path = self.write_jsonl(self.records)
+        RecipeImport.objects.create(
+            user=self.user,
+            digest=self.digest(path),
+            imported=3
+        )
+
+        self.import_recipes(path, '--resume')
+
+        titles = Recipe.objects.values_list('title', flat=True)
+
+        self.assertCountEqual(titles, ["Recipe 3", "Recipe 4"])
+
+    def test_import_resume_other_import(self):
+        """should not resume from the progress of another file or user"""
+        path = self.write_jsonl(self.records)
+        other = get_user_model().objects.create_user(
+            "other@mail.com",
+            "testpass"
+        )
+        RecipeImport.objects.create(
+            user=other,
+            digest=self.digest(path),
+            imported=3
+        )
+        RecipeImport.objects.create(
+            user=self.user,
+            digest=hashlib.sha256(b'other').hexdigest(),
+            imported=3
+        )
+
+        self.import_recipes(path, '--resume')
+
+        self.assertEqual(Recipe.objects.count(), 5)
+
+    def test_import_invalid_record(self):
+        """should keep the imported chunks and stop at an invalid record"""
+        self.records[3]['price'] = "free"
+        path = self.write_jsonl(self.records)
+
+        with self.assertRaises(CommandError):
+            self.import_recipes(path, '--chunk-size', '2')
+
+        progress = RecipeImport.objects.get(
+            user=self.user,
+            digest=self.digest(path)
+        )
+
+        self.assertEqual(progress.imported, 2)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_import_failed_chunk(self):
+        """should not record the progress of a chunk that failed to load"""
+        path = self.write_jsonl(self.records)
+
+        with patch(
+            'core.models.RecipeQuerySet.update_search_vector',
+            side_effect=[None, OperationalError]
+        ), self.assertRaises(OperationalError):
+            self.import_recipes(path, '--chunk-size', '2')
+
+        progress = RecipeImport.objects.get(user=self.user)
+
+        self.assertEqual(progress.imported, 2)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_import_long_names(self):
+        """should truncate the names too long to be stored"""
+        self.records[0]['tags'] = ["T" * 300]
+        self.records[0]['ingredients'] = ["I" * 300]
+        path = self.write_jsonl(self.records[:1])
+
+        self.import_recipes(path, '--method', 'copy')
+
+        recipe = Recipe.objects.get(user=self.user)
+
+        self.assertEqual(recipe.tags.get().name, "T" * 255)
+        self.assertEqual(recipe.ingredients.get().name, "I" * 255)
@@ -0,0 +1,163 @@
+import threading
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.db.backends.postgresql.base import DatabaseWrapper
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools, \
+    pool_stats
+
+
+class FakeConnection:
+    """Stands for a raw database connection"""
+
+    def __init__(self):
+        self.closed = False
+        self.in_transaction = False
+
+    def get_transaction_status(self):
+        return int(self.in_transaction)
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Tests the bounded connection pool"""
+
+    def pool(self, **kwargs):
+        """Returns a pool of fake connections"""
+        options = {'max_size': 2, 'timeout': 0.05, **kwargs}
+
+        return ConnectionPool(FakeConnection, **options)
+
+    def test_reuse_released_connection(self):
+        """should hand out a released connection again"""
+        pool = self.pool()
+
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_bounded_size(self):
+        """should time out when every connection is in use"""
+        pool = self.pool(max_size=1)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        self.assertEqual(pool.stats()['timeouts'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_wait_for_release(self):
+        """should give a waiting thread the next released connection"""
+        pool = self.pool(max_size=1, timeout=5)
+        held = pool.acquire()
+        acquired = []
+
+        waiter = threading.Thread(target=lambda: acquired.append(
+            pool.acquire()
+        ))
+        waiter.start()
+
+        while pool.stats()['waiting'] == 0:
+            pass
+
+        pool.release(held)
+        waiter.join()
+
+        self.assertEqual(acquired, [held])
+        self.assertEqual(pool.stats()['waiting'], 0)
+
+    def test_recycle_old_connection(self):
+        """should close connections which outlived their maximum age"""
+        pool = self.pool(max_age=0)
+
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(pool.acquire(), first)
+        self.assertEqual(pool.stats()['recycled'], 1)
+
+    def test_discard_unhealthy_connection(self):
+        """should not hand out idle connections failing the check"""
+        pool = self.pool(check=lambda connection: False)
+
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertIsNot(pool.acquire(), first)
+        self.assertTrue(first.closed)
+
+    def test_rollback_on_release(self):
+        """should roll back a transaction left open by the last user"""
+        pool = self.pool()
+
+        first = pool.acquire()
+        first.in_transaction = True
+        pool.release(first)
+
+        self.assertFalse(first.in_transaction)
+        self.assertIs(pool.acquire(), first)
+
+
+class DatabaseWrapperTests(TestCase):
+    """Tests the health checks and pooling of the database backend"""
+
+    def wrapper(self, **settings):
+        """Returns a database wrapper with its own connection"""
+        return DatabaseWrapper(
+            {**connection.settings_dict, **settings},
+            connection.alias
+        )
+
+    def tearDown(self):
+        close_pools()
+
+    def test_health_check_replaces_broken_connection(self):
+        """should reconnect when a reused connection stopped working"""
+        wrapper = self.wrapper(CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        broken = wrapper.connection
+
+        # A new request starts, and the server dropped the connection
+        wrapper.close_if_unusable_or_obsolete()
+        broken.close()
+        wrapper.ensure_connection()
+
+        self.assertIsNot(wrapper.connection, broken)
+        self.assertTrue(wrapper.is_usable())
+        wrapper.close()
+
+    def test_pool_shares_connections(self):
+        """should reuse the pooled connection in another wrapper"""
+        settings = {
+            'POOL': {'MAX_SIZE': 2, 'TIMEOUT': 1, 'MAX_AGE': 60},
+            # Other connection parameters, so a pool of its own
+            'OPTIONS': {
+                **connection.settings_dict['OPTIONS'],
+                'application_name': 'pool-test'
+            },
+        }
+        first = self.wrapper(**settings)
+        second = self.wrapper(**settings)
+
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+        second.ensure_connection()
+        reused = second.connection
+        second.close()
+
+        self.assertIs(reused, raw)
+        self.assertIs(second._pool, first._pool)
+        self.assertEqual(second._pool.stats()['created'], 1)
+        self.assertIn(connection.alias, pool_stats())
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from core import models
+
+
+class ContentAddressedFileTests(TestCase):
+    """Tests the storage of recipe images by content"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def sample_recipe(self):
+        """Creates a sample recipe"""
+        return models.Recipe.objects.create(
+            user=self.user,
+            title="Soup",
+            time_minutes=5,
+            price=5.00
+        )
+
+    def test_image_named_by_content(self):
+        """should name the stored image by the hash of its content"""
+        recipe = self.sample_recipe()
+        recipe.image.save('Photo.JPG', ContentFile(b'content'))
+
+        digest = hashlib.sha256(b'content').hexdigest()
+
+        self.assertEqual(recipe.image.name, f'uploads/recipe/{digest}.jpg')
+        self.assertTrue(os.path.exists(recipe.image.path))
+
+    def test_identical_images_stored_once(self):
+        """should store identical images in a single file"""
+        recipe1 = self.sample_recipe()
+        recipe2 = self.sample_recipe()
+
+        recipe1.image.save('one.jpg', ContentFile(b'same'))
+        recipe2.image.save('two.jpg', ContentFile(b'same'))
+
+        self.assertEqual(recipe1.image.name, recipe2.image.name)
+        self.assertEqual(
+            os.listdir(os.path.join(self.media_root, 'uploads/recipe')),
+            [os.path.basename(recipe1.image.name)]
+        )
+
+    def test_hash_named_file_path(self):
+        """should keep names which are already content hashes"""
+        digest = hashlib.sha256(b'content').hexdigest()
+
+        file_path = models.recipe_image_file_path(None, f'{digest}.png')
+
+        self.assertEqual(file_path, f'uploads/recipe/{digest}.png')
@@ -0,0 +1,81 @@
+import json
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.handlers import ASGIHandler
+from core.models import Recipe, Tag
+
+
+EXPORT_RECIPES_URL = reverse('recipe:recipe-export')
+
+
+class ASGIHandlerTests(TestCase):
+    """Tests serving streaming responses through the ASGI handler"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@mail.com',
+            'testpass'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def request(self, path):
+        """Sends a GET through the ASGI handler, returning the messages"""
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        # Like the test client, keeps the connection of the test transaction
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+
+        try:
+            async_to_sync(ASGIHandler())({
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'query_string': b'',
+                'headers': [
+                    (b'host', b'testserver'),
+                    (b'authorization', f'Token {self.token.key}'.encode()),
+                ],
+            }, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        return messages
+
+    def test_stream_export(self):
+        """should stream the export, querying outside of the event loop"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        for i in range(3):
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5
+            ).tags.add(tag)
+
+        messages = self.request(EXPORT_RECIPES_URL)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertEqual(
+            [json.loads(line)['title'] for line in body.splitlines()],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2']
+        )
+        self.assertFalse(messages[-1].get('more_body', False))
@@ -98,3 +98,82 @@ class ModelTests(TestCase):
 
         exp_path = f'uploads/recipe/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
+
+
+class RecipeCountTests(TestCase):
+    """Tests the recipe counts kept on tags and ingredients"""
+
+    def setUp(self):
+        self.user = sample_user()
+        self.tags = [
+            models.Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(2)
+        ]
+        self.ingredient = models.Ingredient.objects.create(
+            user=self.user,
+            name='Rice'
+        )
+        self.recipes = [
+            models.Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5.00
+            )
+            for i in range(2)
+        ]
+
+    def counts(self):
+        """Returns the recipe counts of the tags"""
+        return [
+            tag.recipe_count
+            for tag in models.Tag.objects.filter(
+                pk__in=[tag.pk for tag in self.tags]
+            ).order_by('name')
+        ]
+
+    def test_count_added_recipes(self):
+        """should count each recipe a tag is added to once"""
+        self.recipes[0].tags.add(*self.tags)
+        self.recipes[0].tags.add(self.tags[0])
+        self.recipes[1].tags.add(self.tags[0])
+        self.recipes[0].ingredients.add(self.ingredient)
+
+        self.ingredient.refresh_from_db()
+
+        self.assertEqual(self.counts(), [2, 1])
+        self.assertEqual(self.ingredient.recipe_count, 1)
+
+    def test_uncount_removed_recipes(self):
+        """should only uncount the relations actually removed"""
+        self.recipes[0].tags.add(self.tags[0])
+
+        self.recipes[0].tags.remove(*self.tags)
+        self.recipes[1].tags.remove(self.tags[0])
+
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_count_reverse_relations(self):
+        """should count recipes added and removed from the tag side"""
+        self.tags[0].recipe_set.add(*self.recipes)
+        self.tags[1].recipe_set.add(self.recipes[0])
+        self.tags[0].recipe_set.remove(self.recipes[0])
+
+        self.assertEqual(self.counts(), [1, 1])
+
+        self.tags[0].recipe_set.clear()
+        self.recipes[0].tags.clear()
+
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_uncount_deleted_recipe(self):
+        """should uncount a deleted recipe from its tags and ingredients"""
+        for recipe in self.recipes:
+            recipe.tags.add(self.tags[0])
+            recipe.ingredients.add(self.ingredient)
+
+        self.recipes[0].delete()
+        self.ingredient.refresh_from_db()
+
+        self.assertEqual(self.counts(), [1, 0])
+        self.assertEqual(self.ingredient.recipe_count, 1)
@@ -0,0 +1,213 @@
+import asyncio
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, \
+    TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.db.routers import ReplicaRouter, read_alias, use_primary
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+
+from user.authentication import CachedTokenAuthentication, token_cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def current_alias(request):
+    """Answers with the database the reads of the request go to"""
+    return HttpResponse(str(ReplicaRouter().db_for_read(Recipe)))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Tests routing reads and writes between primary and replicas"""
+
+    def test_read_from_request_replica(self):
+        """should read from the replica chosen for the request"""
+        token = read_alias.set('replica1')
+
+        try:
+            self.assertEqual(ReplicaRouter().db_for_read(Recipe), 'replica1')
+            self.assertEqual(ReplicaRouter().db_for_write(Recipe), 'default')
+
+            with use_primary():
+                self.assertIsNone(ReplicaRouter().db_for_read(Recipe))
+        finally:
+            read_alias.reset(token)
+
+    def test_read_instance_database(self):
+        """should read relations from the database of their instance"""
+        recipe = Recipe()
+        recipe._state.db = 'default'
+        token = read_alias.set('replica1')
+
+        try:
+            self.assertEqual(
+                ReplicaRouter().db_for_read(Recipe, instance=recipe),
+                'default'
+            )
+        finally:
+            read_alias.reset(token)
+
+    def test_never_migrate_replicas(self):
+        """should leave the replicas out of migrations"""
+        router = ReplicaRouter()
+
+        self.assertFalse(router.allow_migrate('replica1', 'core'))
+        self.assertIsNone(router.allow_migrate('default', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class PrimaryReadTests(TransactionTestCase):
+    """Tests the reads kept on the primary during safe requests"""
+
+    def test_read_primary_in_transaction(self):
+        """should read from the primary inside a transaction"""
+        token = read_alias.set('replica1')
+
+        try:
+            with transaction.atomic():
+                self.assertIsNone(ReplicaRouter().db_for_read(Recipe))
+        finally:
+            read_alias.reset(token)
+
+    def test_token_lookup_on_primary(self):
+        """should authenticate tokens against the primary"""
+        user = get_user_model().objects.create_user(
+            'test@mail.com',
+            'testpass'
+        )
+        key = Token.objects.create(user=user).key
+        token_cache.delete(key)
+        # Not a configured database, any query there would fail
+        token = read_alias.set('replica1')
+
+        try:
+            authenticated, _ = CachedTokenAuthentication(
+            ).authenticate_credentials(key)
+        finally:
+            read_alias.reset(token)
+            token_cache.delete(key)
+
+        self.assertEqual(authenticated, user)
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1'],
+    DB_REPLICA_PIN_SECONDS=5
+)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Tests choosing the database of each request"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(current_alias)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_safe_request_on_replica(self):
+        """should route the reads of safe requests to a replica"""
+        res = self.middleware(self.factory.get('/'))
+
+        self.assertEqual(res.content, b'replica1')
+        self.assertIsNone(read_alias.get())
+
+    def test_write_on_primary(self):
+        """should route the reads of writes to the primary"""
+        res = self.middleware(self.factory.post('/'))
+
+        self.assertEqual(res.content, b'None')
+
+    def test_pin_writer_to_primary(self):
+        """should read from the primary right after a write"""
+        self.middleware(self.factory.post('/', HTTP_AUTHORIZATION='Token a'))
+
+        pinned = self.middleware(
+            self.factory.get('/', HTTP_AUTHORIZATION='Token a')
+        )
+        other = self.middleware(
+            self.factory.get('/', HTTP_AUTHORIZATION='Token b')
+        )
+
+        self.assertEqual(pinned.content, b'None')
+        self.assertEqual(other.content, b'replica1')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """should read from the primary without replicas"""
+        res = self.middleware(self.factory.get('/'))
+
+        self.assertEqual(res.content, b'None')
+
+    def test_async_request(self):
+        """should route the reads of async requests too"""
+        async def get_response(request):
+            return current_alias(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        res = asyncio.run(middleware(self.factory.get('/')))
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(res.content, b'replica1')
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'No read replica configured')
+class ReplicaIntegrationTests(TransactionTestCase):
+    """Tests the API against a primary and a replica database"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@mail.com',
+            'testpass'
+        )
+        self.auth = f'Token {Token.objects.create(user=self.user).key}'
+        self.replica = connections[settings.DATABASE_REPLICAS[0]]
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_list_from_replica_after_pin(self):
+        """should list from the replica unless the user just wrote"""
+        with CaptureQueriesContext(self.replica) as replica_queries:
+            res = self.client.get(RECIPES_URL, HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(replica_queries.captured_queries)
+
+        res = self.client.post(
+            RECIPES_URL,
+            {'title': 'Pancakes', 'time_minutes': 10, 'price': 3},
+            HTTP_AUTHORIZATION=self.auth
+        )
+        self.assertEqual(res.status_code, 201)
+
+        with CaptureQueriesContext(self.replica) as replica_queries:
+            res = self.client.get(RECIPES_URL, HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertFalse(replica_queries.captured_queries)
+
+    def test_writes_on_primary(self):
+        """should never write to the replica"""
+        with CaptureQueriesContext(self.replica) as replica_queries:
+            res = self.client.post(
+                RECIPES_URL,
+                {'title': 'Pancakes', 'time_minutes': 10, 'price': 3},
+                HTTP_AUTHORIZATION=self.auth
+            )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertFalse(replica_queries.captured_queries)
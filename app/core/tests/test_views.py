@@ -0,0 +1,212 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+class MediaViewTests(TestCase):
+    """Tests the serving of media files"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        os.makedirs(os.path.join(self.media_root, 'uploads/recipe'))
+        self.digest = hashlib.sha256(CONTENT).hexdigest()
+        self.path = f'uploads/recipe/{self.digest}.jpg'
+
+        self.rendition = f'uploads/recipe/renditions/{self.digest}_webp.webp'
+
+        os.makedirs(os.path.join(self.media_root, 'uploads/recipe/renditions'))
+
+        for path in (self.path, self.rendition, 'other.png'):
+            with open(os.path.join(self.media_root, path), 'wb') as file:
+                file.write(CONTENT)
+
+        self.user = get_user_model().objects.create_user(
+            'test@mail.com',
+            'testpass'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        for image in (self.path, 'other.png'):
+            Recipe.objects.create(
+                user=self.user,
+                title='Soup',
+                time_minutes=10,
+                price=5.00,
+                image=image,
+                image_renditions={'webp': self.rendition}
+            )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def get(self, path, token=None, **headers):
+        """Requests a media file with an API token, the user's by default"""
+        return self.client.get(
+            reverse('media', args=[path]),
+            HTTP_AUTHORIZATION=f'Token {token or self.token.key}',
+            **headers
+        )
+
+    def test_serve_media(self):
+        """should serve the whole file with its validators"""
+        res = self.get(self.path)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_serve_media_cache_control(self):
+        """should let clients cache content addressed files forever"""
+        immutable = self.get(self.path)['Cache-Control']
+        mutable = self.get('other.png')['Cache-Control']
+
+        self.assertIn('immutable', immutable)
+        self.assertIn('max-age=31536000', immutable)
+        self.assertIn('private', immutable)
+        self.assertIn('no-cache', mutable)
+        self.assertIn('private', mutable)
+
+    def test_serve_media_authentication_required(self):
+        """should refuse requests without a valid API token"""
+        res = self.client.get(reverse('media', args=[self.path]))
+        invalid = self.get(self.path, token='invalid')
+
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+        self.assertEqual(invalid.status_code, 401)
+
+    def test_serve_media_of_other_users(self):
+        """should only serve files used by a recipe of the user"""
+        other = get_user_model().objects.create_user(
+            'other@mail.com',
+            'testpass'
+        )
+        token = Token.objects.create(user=other)
+
+        res = self.get(self.path, token=token.key)
+
+        self.assertEqual(res.status_code, 404)
+
+        # The same image uploaded by the other user shares the file
+        Recipe.objects.create(
+            user=other,
+            title='Salad',
+            time_minutes=10,
+            price=5.00,
+            image=self.path
+        )
+
+        self.assertEqual(self.get(self.path, token=token.key).status_code, 200)
+        self.assertEqual(
+            self.get(self.rendition, token=token.key).status_code,
+            404
+        )
+
+    def test_serve_media_rendition(self):
+        """should serve the renditions of the images of the user"""
+        res = self.get(self.rendition)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'image/webp')
+
+    def test_serve_media_not_modified(self):
+        """should answer 304 when the client copy is current"""
+        etag = self.get(self.path)['ETag']
+
+        res = self.get(self.path, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_serve_media_range(self):
+        """should serve the requested byte ranges"""
+        res = self.get(self.path, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(res['Content-Length'], '10')
+
+        res = self.get(self.path, HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[-5:])
+
+    def test_serve_media_range_not_satisfiable(self):
+        """should refuse ranges starting after the end of the file"""
+        res = self.get(self.path, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_serve_media_if_range(self):
+        """should serve the whole file when the range validator is stale"""
+        etag = self.get(self.path)['ETag']
+
+        current = self.get(
+            self.path,
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE=etag
+        )
+        stale = self.get(
+            self.path,
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE='"stale"'
+        )
+
+        self.assertEqual(current.status_code, 206)
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(b''.join(stale.streaming_content), CONTENT)
+
+    def test_serve_media_outside_root(self):
+        """should not serve directories or files outside the media root"""
+        self.assertEqual(self.get('uploads/recipe').status_code, 404)
+        self.assertEqual(self.get('../etc/passwd').status_code, 404)
+        self.assertEqual(self.get('missing.jpg').status_code, 404)
+
+    @override_settings(
+        MEDIA_ACCEL='x-accel-redirect',
+        MEDIA_ACCEL_PREFIX='/protected-media/'
+    )
+    def test_serve_media_x_accel_redirect(self):
+        """should hand the transfer over to nginx"""
+        res = self.get(self.path)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            f'/protected-media/{self.path}'
+        )
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+
+    @override_settings(MEDIA_ACCEL='x-sendfile')
+    def test_serve_media_x_sendfile(self):
+        """should hand the transfer over to the web server"""
+        res = self.get(self.path)
+
+        self.assertEqual(
+            res['X-Sendfile'],
+            os.path.join(self.media_root, self.path)
+        )
+        self.assertEqual(res.content, b'')
@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+
+from core import warmup
+
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from user.serializers import UserSerializer
+
+
+class WarmupTests(TestCase):
+    """Tests priming a worker before its first request"""
+
+    def test_warmup_runs_every_step(self):
+        """should time each warm-up step"""
+        timings = warmup.warmup()
+
+        self.assertEqual(
+            list(timings),
+            [step.__name__ for step in warmup.STEPS]
+        )
+
+    def test_failing_step_logged(self):
+        """should log a failing step and go on with the next ones"""
+        def fail():
+            raise ConnectionError
+
+        with patch.object(warmup, 'STEPS', (fail, warmup.warm_templates)), \
+                self.assertLogs('core.warmup', 'WARNING'):
+            timings = warmup.warmup()
+
+        self.assertEqual(list(timings), ['fail', 'warm_templates'])
+
+    def test_serializer_classes(self):
+        """should find the serializers of every app"""
+        warmup.warm_serializers()
+        classes = set(warmup.serializer_classes())
+
+        self.assertIn(RecipeSerializer, classes)
+        self.assertIn(RecipeDetailSerializer, classes)
+        self.assertIn(UserSerializer, classes)
+
+    def test_asgi_warms_pooled_connections_only(self):
+        """should not connect the event loop thread to unpooled databases"""
+        with patch.object(connection, 'ensure_connection') as connect:
+            timings = warmup.warmup(warmup.ASGI_STEPS)
+
+        self.assertIn('warm_pooled_connections', timings)
+        self.assertNotIn('warm_connections', timings)
+        connect.assert_not_called()
+
+    def test_pooled_connections_returned(self):
+        """should hand the connections of pooled databases back to the pool"""
+        with patch.dict(connection.settings_dict, {'POOL': {'MAX_SIZE': 1}}), \
+                patch.object(connection, 'ensure_connection') as connect, \
+                patch.object(connection, 'close') as close:
+            warmup.warm_pooled_connections()
+
+        connect.assert_called_once_with()
+        close.assert_called_once_with()
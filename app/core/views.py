@@ -0,0 +1,236 @@
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, \
+    StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.files import is_content_addressed
+from core.models import Recipe
+from recipe.renditions import RENDITIONS
+from user.authentication import CachedTokenAuthentication
+
+
+# A year, the longest lifetime caches are expected to honour
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+RANGE_RE = re.compile(r'bytes=(?P<first>\d*)-(?P<last>\d*)')
+
+CHUNK_SIZE = 64 * 2 ** 10
+
+
+def resolve_media(path):
+    """Returns the normalized path, full path and stat of a media file
+
+    Only regular files below MEDIA_ROOT can be served.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Media file not found')
+
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404('Media file not found')
+
+    return path, full_path, stat_result
+
+
+def authenticate(request):
+    """Returns the user of the API token sent with a request, or None"""
+    try:
+        credentials = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+
+    return credentials[0] if credentials else None
+
+
+def is_used_by(user, path):
+    """Tells whether a recipe of a user has a media file as image or rendition
+
+    Identical images share a file, so it may belong to other users as well.
+    """
+    references = Q(image=path)
+
+    for rendition in RENDITIONS:
+        references |= Q(**{f'image_renditions__{rendition}': path})
+
+    return Recipe.objects.filter(references, user=user).exists()
+
+
+def parse_range(header, size):
+    """Returns the first and last bytes of a single range request
+
+    None means the whole file is sent: there is no range, or one this view
+    does not handle, like multiple ranges. ValueError is raised for ranges
+    the file cannot satisfy.
+    """
+    match = RANGE_RE.fullmatch(header.replace(' ', '')) if header else None
+
+    if match is None or not any(match.groups()):
+        return None
+
+    first, last = match['first'], match['last']
+
+    if not first:
+        # The last bytes of the file
+        if not int(last):
+            raise ValueError('Empty suffix range')
+
+        return max(size - int(last), 0), size - 1
+
+    if last and int(last) < int(first):
+        return None
+
+    if int(first) >= size:
+        raise ValueError('Range starts after the end of the file')
+
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+def if_range_matches(request, etag, last_modified):
+    """Tells whether a range request still applies to the current file"""
+    validator = request.META.get('HTTP_IF_RANGE')
+
+    if validator is None:
+        return True
+
+    if validator.startswith(('"', 'W/')):
+        # Weak validators never allow a range
+        return validator == etag
+
+    return parse_http_date_safe(validator) == last_modified
+
+
+def read_range(full_path, start, length):
+    """Yields length bytes of a file from start"""
+    with open(full_path, 'rb') as file:
+        file.seek(start)
+
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+
+            if not chunk:
+                return
+
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request, full_path, size, etag, last_modified):
+    """Sends a file, or the single byte range requested from it"""
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+
+        return response
+
+    if byte_range is None or not if_range_matches(
+        request,
+        etag,
+        last_modified
+    ):
+        # Servers can hand the open file to sendfile()
+        response = FileResponse(open(full_path, 'rb'))
+    else:
+        first, last = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, first, last - first + 1),
+            status=206
+        )
+        response['Content-Length'] = last - first + 1
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Serves a media file, handing the transfer to the front proxy if any
+
+    Files are private: only a user with a recipe using a file, identified
+    by an API token, gets it. With MEDIA_ACCEL set, the worker only resolves
+    the file and answers with the headers telling the proxy which file to
+    send.
+    """
+    user = authenticate(request)
+
+    if user is None:
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = CachedTokenAuthentication.keyword
+
+        return response
+
+    path, full_path, stat_result = resolve_media(path)
+
+    if not is_used_by(user, path):
+        # The same answer as for missing files, hiding which exist
+        raise Http404('Media file not found')
+
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    last_modified = int(stat_result.st_mtime)
+
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+
+    if response is None:
+        if settings.MEDIA_ACCEL == 'x-accel-redirect':
+            response = HttpResponse()
+            response['X-Accel-Redirect'] = quote(
+                settings.MEDIA_ACCEL_PREFIX + path
+            )
+        elif settings.MEDIA_ACCEL == 'x-sendfile':
+            response = HttpResponse()
+            response['X-Sendfile'] = full_path
+        else:
+            response = file_response(
+                request,
+                full_path,
+                stat_result.st_size,
+                etag,
+                last_modified
+            )
+
+        if response.status_code != 416:
+            content_type, _ = mimetypes.guess_type(path)
+            response['Content-Type'] = (
+                content_type or 'application/octet-stream'
+            )
+            response['Last-Modified'] = http_date(last_modified)
+
+    response['ETag'] = etag
+
+    if is_content_addressed(path):
+        # The file at a content addressed path never changes
+        patch_cache_control(
+            response,
+            private=True,
+            max_age=IMMUTABLE_MAX_AGE,
+            immutable=True
+        )
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+
+    return response
@@ -0,0 +1,126 @@
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import autodiscover_modules
+
+from rest_framework.serializers import Serializer
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls(resolver=None):
+    """Builds the URL resolvers, compiling every route pattern"""
+    resolver = resolver or get_resolver()
+    # Namespaced resolvers are populated apart from their parent
+    resolver.reverse_dict
+
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+
+        if isinstance(pattern, URLResolver):
+            warm_urls(pattern)
+
+
+def serializer_classes(cls=Serializer):
+    """Yields the serializers declared by the apps of the project"""
+    modules = {
+        f'{config.name}.serializers' for config in apps.get_app_configs()
+        if config.path.startswith(str(settings.BASE_DIR))
+    }
+
+    for subclass in cls.__subclasses__():
+        if subclass.__module__ in modules:
+            yield subclass
+
+        yield from serializer_classes(subclass)
+
+
+def warm_serializers():
+    """Builds the fields of every app serializer, filling the model caches"""
+    autodiscover_modules('serializers')
+
+    for serializer_class in set(serializer_classes()):
+        serializer_class().fields
+
+
+def warm_templates():
+    """Loads the template of the browsable API"""
+    get_template('rest_framework/api.html')
+
+
+def warm_connections(pooled_only=False):
+    """Connects to every database, or only to the pooled ones"""
+    for alias in connections:
+        connection = connections[alias]
+        pooled = connection.settings_dict.get('POOL')
+
+        if pooled_only and not pooled:
+            continue
+
+        connection.ensure_connection()
+
+        if pooled:
+            # Into the pool, for whichever thread serves the first request
+            connection.close()
+
+
+def warm_pooled_connections():
+    """Fills the pools of the pooled databases
+
+    Any other connection belongs to the thread opening it, under ASGI the
+    event loop thread, where no query runs.
+    """
+    warm_connections(pooled_only=True)
+
+
+def warm_caches():
+    """Opens the connections of every cache"""
+    for alias in caches:
+        caches[alias].get('warmup')
+
+
+STEPS = (
+    warm_urls,
+    warm_serializers,
+    warm_templates,
+    warm_connections,
+    warm_caches,
+)
+
+ASGI_STEPS = tuple(
+    warm_pooled_connections if step is warm_connections else step
+    for step in STEPS
+)
+
+
+def warmup(steps=None):
+    """Primes what a worker otherwise builds on its first requests
+
+    Runs STEPS unless given other steps. Returns the seconds spent in each
+    step. A failing step is logged and skipped, a worker still boots while
+    a dependency is down.
+    """
+    timings = {}
+
+    for step in STEPS if steps is None else steps:
+        start = time.perf_counter()
+
+        try:
+            step()
+        except Exception:
+            logger.warning(
+                'Warm-up step %s failed',
+                step.__name__,
+                exc_info=True
+            )
+
+        timings[step.__name__] = time.perf_counter() - start
+
+    return timings
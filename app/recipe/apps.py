@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        from PIL import Image
+        from django.conf import settings
+
+        from recipe import signals  # noqa: F401
+
+        # Pillow refuses to open images twice over its limit
+        Image.MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
@@ -0,0 +1,92 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from rest_framework.routers import DefaultRouter
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the bounded pool running the wrapped views"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_VIEW_WORKERS,
+                thread_name_prefix='views'
+            )
+
+    return _executor
+
+
+def run_view(view, request, *args, **kwargs):
+    """Runs a sync view to a fully rendered response in a worker thread"""
+    # Each worker keeps its own connection, recycled as a request would
+    close_old_connections()
+
+    try:
+        response = view(request, *args, **kwargs)
+
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Wraps a sync view into an async one running on the bounded pool
+
+    The event loop only waits for the worker, and then writes the rendered
+    response at the pace of the client without holding a thread.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        context = contextvars.copy_context()
+        call = functools.partial(run_view, view, request, *args, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            get_executor(),
+            context.run,
+            call
+        )
+
+    return wrapper
+
+
+class AsyncReadRouter(DefaultRouter):
+    """Router serving the list and detail routes from async views
+
+    Only when ASYNC_VIEWS is on, as the ASGI entry point does. Under WSGI
+    the async views would only add an event loop to each request.
+    """
+    async_routes = ('{basename}-list', '{basename}-detail')
+
+    def get_urls(self):
+        """Wraps the views of the list and detail routes"""
+        urls = super().get_urls()
+
+        if not settings.ASYNC_VIEWS:
+            return urls
+
+        names = {
+            route.format(basename=basename)
+            for _, _, basename in self.registry
+            for route in self.async_routes
+        }
+
+        for url in urls:
+            if url.name in names:
+                url.callback = async_view(url.callback)
+
+        return urls
@@ -0,0 +1,100 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.response import Response
+
+from recipe.conditional import conditional_response, make_etag
+
+
+GENERATION_KEY = 'recipes:generation:{user_id}'
+LIST_KEY = 'recipes:list:{label}:{user_id}:{generation}:{params}'
+HITS_KEY = 'recipes:stats:hits'
+MISSES_KEY = 'recipes:stats:misses'
+
+
+def get_generation(user_id):
+    """Returns the current cache generation of a user"""
+    key = GENERATION_KEY.format(user_id=user_id)
+    cache.add(key, time.time_ns(), None)
+
+    return cache.get(key)
+
+
+def bump_generation(user_id):
+    """Invalidates every cached response of a user"""
+    key = GENERATION_KEY.format(user_id=user_id)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Restarting from the clock never reuses an evicted generation
+        cache.set(key, time.time_ns(), None)
+
+
+def _incr(key):
+    """Increments a counter shared by every worker"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats():
+    """Returns the hit and miss counts of the response cache"""
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
+
+
+class CachedListMixin:
+    """Caches the list responses per user until any of their objects change"""
+
+    def get_list_cache_key(self, request):
+        """Builds the cache key for the current user and query params"""
+        # Pagination links are absolute, so the host is part of the key
+        params = request.get_host() + '?' + '&'.join(
+            f'{key}={value}'
+            for key, values in sorted(request.query_params.lists())
+            for value in values
+        )
+
+        return LIST_KEY.format(
+            label=self.queryset.model._meta.label_lower,
+            user_id=request.user.pk,
+            generation=get_generation(request.user.pk),
+            params=hashlib.md5(params.encode()).hexdigest()
+        )
+
+    def list(self, request, *args, **kwargs):
+        """Returns the cached list response, if still valid"""
+        key = self.get_list_cache_key(request)
+
+        def render():
+            data = cache.get(key)
+
+            if data is not None:
+                _incr(HITS_KEY)
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+
+                return response
+
+            _incr(MISSES_KEY)
+            response = super(CachedListMixin, self).list(
+                request, *args, **kwargs
+            )
+
+            if response.status_code == 200:
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TTL)
+
+            response['X-Cache'] = 'MISS'
+
+            return response
+
+        # The key changes whenever the list may change, so it is the ETag
+        return conditional_response(request, render, make_etag(request, key))
@@ -0,0 +1,100 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(request, *state):
+    """Builds a strong ETag for the requested representation of a state"""
+    parts = (
+        request.user.pk,
+        request.build_absolute_uri(),
+        request.accepted_renderer.format
+    ) + state
+
+    return '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def conditional_response(request, render, etag, last_modified=None):
+    """Answers with 304 when the client already has the representation
+
+    render is only called when the client copy is missing or stale.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+
+    if response is not None:
+        return response
+
+    response = render()
+
+    if response.status_code == 200:
+        response['ETag'] = etag
+
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
+    return response
+
+
+class ConditionalGetMixin:
+    """Handles conditional GETs from a cheap query, before serializing"""
+
+    def get_list_state(self):
+        """Returns a fingerprint of the listed objects"""
+        queryset = self.filter_queryset(self.get_queryset())
+
+        return tuple(queryset.prefetch_related(None).aggregate(
+            count=Count('pk'),
+            ids=Sum('pk'),
+            updated_at=Max('updated_at')
+        ).values())
+
+    def get_detail_updated_at(self):
+        """Returns when the requested object last changed, if it exists"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        try:
+            return queryset.prefetch_related(None).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def list(self, request, *args, **kwargs):
+        """Lists the objects, unless the client copy is current"""
+        def render():
+            return super(ConditionalGetMixin, self).list(
+                request, *args, **kwargs
+            )
+
+        return conditional_response(
+            request,
+            render,
+            make_etag(request, *self.get_list_state())
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieves the object, unless the client copy is current"""
+        updated_at = self.get_detail_updated_at()
+
+        def render():
+            return super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+
+        if updated_at is None:
+            return render()
+
+        return conditional_response(
+            request,
+            render,
+            make_etag(request, updated_at),
+            int(updated_at.timestamp())
+        )
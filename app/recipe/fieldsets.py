@@ -0,0 +1,103 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+from rest_framework.exceptions import ValidationError
+
+from recipe.pagination import cursor_fields
+
+
+class SparseFieldsetMixin:
+    """Represents and loads only the fields named by the fields query param
+
+    The serializer must take a fields argument, like SparseFieldsMixin.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self):
+        """Returns the fields to represent, all unless some are requested"""
+        available = self.get_serializer_class().Meta.fields
+        value = self.request.query_params.get('fields')
+
+        if self.action not in self.sparse_actions or value is None:
+            return available
+
+        requested = {name.strip() for name in value.split(',')} - {''}
+
+        if not requested or not requested <= set(available):
+            raise ValidationError({
+                'fields': 'Must be a comma separated list of: '
+                          f'{", ".join(available)}.'
+            })
+
+        return tuple(name for name in available if name in requested)
+
+    def get_prefetch_lookups(self):
+        """Returns the prefetches of the represented relations to many objects
+
+        Related objects come by primary key, like the ID lists of the rows.
+        """
+        opts = self.queryset.model._meta
+        lookups = []
+
+        for name in self.get_sparse_fields():
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+
+            if field.many_to_many or field.one_to_many:
+                lookups.append(Prefetch(
+                    name,
+                    queryset=field.related_model.objects.order_by('pk')
+                ))
+
+        return lookups
+
+    def get_loaded_columns(self, queryset):
+        """Returns the model fields to load, or None when unknown"""
+        opts = queryset.model._meta
+        names = list(self.get_sparse_fields())
+
+        if self.action == 'list':
+            # The cursor is read from the instances
+            names += [
+                name for name in cursor_fields(self, queryset)
+                if name not in queryset.query.annotations
+            ]
+
+        columns = {opts.pk.name}
+
+        for name in names:
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                # Computed by the serializer, which may read any column
+                return None
+
+            if field.concrete and not field.many_to_many:
+                columns.add(name)
+
+        return columns
+
+    def get_serializer(self, *args, **kwargs):
+        """Limits the serializer to the requested fields"""
+        if self.action in self.sparse_actions:
+            kwargs.setdefault('fields', self.get_sparse_fields())
+
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        """Loads the represented columns and prefetches their relations"""
+        queryset = super().filter_queryset(queryset)
+
+        if self.action not in self.sparse_actions:
+            return queryset
+
+        columns = self.get_loaded_columns(queryset)
+
+        if columns is not None:
+            queryset = queryset.only(*columns)
+
+        return queryset.prefetch_related(None).prefetch_related(
+            *self.get_prefetch_lookups()
+        )
@@ -0,0 +1,137 @@
+import functools
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+    TrigramSimilarity
+from django.db import connections
+from django.db.models import Exists, F, FloatField, OuterRef, Value
+from django.db.models.functions import Cast, Collate, Upper
+
+from rest_framework.exceptions import ValidationError
+
+from core.models import SEARCH_CONFIG
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+# Shorter values have too few trigrams to resemble anything meaningfully
+TRIGRAM_MIN_LENGTH = 3
+
+
+def params_to_ints(param_name, value):
+    """Convert a comma separated string of IDs to a list of integers"""
+    try:
+        return sorted({int(str_id) for str_id in value.split(',')})
+    except ValueError:
+        raise ValidationError(
+            {param_name: 'Must be a comma separated list of IDs.'}
+        )
+
+
+def related_exists(model, field_name, ids):
+    """Returns an EXISTS over the through table of a M2M field
+
+    The subquery is correlated to the outer primary key, so it is
+    answered from the through table index and never duplicates rows.
+    """
+    field = model._meta.get_field(field_name)
+    lookups = {f'{field.m2m_field_name()}_id': OuterRef('pk')}
+
+    if len(ids) == 1:
+        lookups[f'{field.m2m_reverse_field_name()}_id'] = ids[0]
+    else:
+        lookups[f'{field.m2m_reverse_field_name()}_id__in'] = ids
+
+    return Exists(field.remote_field.through.objects.filter(**lookups))
+
+
+def assigned_exists(model, related_name='recipe'):
+    """Returns an EXISTS telling whether a recipe uses each object
+
+    The subquery is answered from the index of the through table on the
+    object column, however many recipes use the object.
+    """
+    relation = model._meta.get_field(related_name)
+    column = f'{relation.field.m2m_reverse_field_name()}_id'
+
+    return Exists(relation.through.objects.filter(**{column: OuterRef('pk')}))
+
+
+def filter_related(queryset, field_name, ids, mode=MATCH_ANY):
+    """Filter a queryset by objects related to ANY or ALL of the IDs"""
+    if mode not in MATCH_MODES:
+        raise ValidationError({
+            f'{field_name}_mode': f'Must be one of: {", ".join(MATCH_MODES)}.'
+        })
+
+    if mode == MATCH_ANY:
+        return queryset.filter(
+            related_exists(queryset.model, field_name, ids)
+        )
+
+    for related_id in ids:
+        queryset = queryset.filter(
+            related_exists(queryset.model, field_name, [related_id])
+        )
+
+    return queryset
+
+
+def search(queryset, value):
+    """Full text search over recipes, annotating the rank of each match"""
+    query = SearchQuery(value, search_type='websearch', config=SEARCH_CONFIG)
+
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def has_trigram(using):
+    """Tells whether the database has the pg_trgm extension installed"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = %s)",
+            ['pg_trgm']
+        )
+
+        return cursor.fetchone()[0]
+
+
+def autocomplete(queryset, value, limit):
+    """Suggests the id and name of objects for a partially typed name
+
+    Names starting with the value come first, in case-insensitive order.
+    Names resembling the value fill the remaining places, if the database
+    has pg_trgm.
+    """
+    value = value.strip()
+
+    if not value:
+        return []
+
+    # The expression of the name prefix index
+    suggestions = list(queryset.alias(
+        name_key=Collate(Upper('name'), 'C')
+    ).filter(
+        name_key__startswith=Upper(Value(value))
+    ).order_by('name_key').values('id', 'name')[:limit])
+
+    if (
+        len(suggestions) < limit and
+        len(value) >= TRIGRAM_MIN_LENGTH and
+        has_trigram(queryset.db)
+    ):
+        suggestions += queryset.filter(
+            name__trigram_similar=value
+        ).exclude(
+            pk__in=[suggestion['id'] for suggestion in suggestions]
+        ).annotate(
+            similarity=TrigramSimilarity('name', value)
+        ).order_by('-similarity', 'name').values(
+            'id',
+            'name'
+        )[:limit - len(suggestions)]
+
+    return suggestions
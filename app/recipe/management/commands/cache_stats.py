@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from recipe import cache
+
+
+class Command(BaseCommand):
+    """Django command to display the response cache hit and miss counts"""
+
+    def handle(self, *args, **options):
+        stats = cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups if lookups else 0
+
+        self.stdout.write(f"Hits: {stats['hits']}")
+        self.stdout.write(f"Misses: {stats['misses']}")
+        self.stdout.write(f'Hit ratio: {ratio:.2%}')
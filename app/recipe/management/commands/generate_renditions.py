@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+
+from recipe.renditions import generate_renditions
+
+
+class Command(BaseCommand):
+    """Django command to render the recipe images missing renditions"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Render again the images which already have renditions'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').exclude(image=None)
+
+        if not options['all']:
+            recipes = recipes.filter(image_renditions={})
+
+        rendered = failed = 0
+
+        for recipe_id, name in recipes.values_list('id', 'image').iterator():
+            if generate_renditions(recipe_id, name, options['all']):
+                rendered += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} images'))
+
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f'Could not render {failed} images'
+            ))
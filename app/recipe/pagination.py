@@ -0,0 +1,209 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+def reverse_ordering(ordering):
+    """Returns the opposite of an ordering"""
+    return tuple(
+        name[1:] if name.startswith('-') else f'-{name}' for name in ordering
+    )
+
+
+class BaseCursorPagination(CursorPagination):
+    """Base keyset pagination for Recipes API list endpoints
+
+    DRF positions its cursor on the first ordering field and steps over the
+    ties with an offset. Here the cursor holds every field of the ordering,
+    the last of which is unique, so each page starts right after a row.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Encodes the values of every ordering field of an object"""
+        return json.dumps([
+            instance[name] if isinstance(instance, dict)
+            else getattr(instance, name)
+            for name in (field.lstrip('-') for field in ordering)
+        ])
+
+    def get_position_filter(self, position, reverse):
+        """Returns the condition matching the objects past a position"""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        ordering = self.ordering
+
+        if reverse:
+            ordering = reverse_ordering(ordering)
+
+        conditions = []
+        ties = Q()
+
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions.append(ties & Q(**{f'{name}__{lookup}': value}))
+            ties &= Q(**{name: value})
+
+        # Bounding the first field too lets an index seek to the position
+        name = ordering[0].lstrip('-')
+        lookup = 'lte' if ordering[0].startswith('-') else 'gte'
+
+        return Q(**{f'{name}__{lookup}': values[0]}) & reduce(or_, conditions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Returns the page of objects following the cursor position"""
+        self.page_size = self.get_page_size(request)
+
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            # Positions are unique, an offset is never needed
+            self.cursor = self.cursor._replace(offset=0)
+            _, reverse, position = self.cursor
+
+        queryset = queryset.order_by(
+            *(reverse_ordering(self.ordering) if reverse else self.ordering)
+        )
+
+        if position is not None:
+            try:
+                queryset = queryset.filter(
+                    self.get_position_filter(position, reverse)
+                )
+            except (TypeError, ValueError, DjangoValidationError):
+                # Values not fitting their fields
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1],
+                self.ordering
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = following_position is not None
+            self.next_position = position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = position is not None
+            self.next_position = following_position
+            self.previous_position = position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        """Links to the page following the last object of this one"""
+        if not self.has_next:
+            return None
+
+        position = self.next_position
+
+        if self.page:
+            position = self._get_position_from_instance(
+                self.page[-1],
+                self.ordering
+            )
+
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        """Links to the page preceding the first object of this one"""
+        if not self.has_previous:
+            return None
+
+        position = self.previous_position
+
+        if self.page:
+            position = self._get_position_from_instance(
+                self.page[0],
+                self.ordering
+            )
+
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+
+class NameCursorPagination(BaseCursorPagination):
+    """Paginates tags and ingredients by name, or by how many recipes use them
+
+    Ties are told apart by id, in the opposite direction of the first field,
+    so that one index scanned either way serves both directions.
+    """
+    ordering = ('-name', 'id')
+    orderings = ('name', '-name', 'recipe_count', '-recipe_count')
+
+    def get_ordering(self, request, queryset, view):
+        """Orders by the field of the ordering query param if given"""
+        ordering = request.query_params.get('ordering')
+
+        if ordering is None:
+            return super().get_ordering(request, queryset, view)
+
+        if ordering not in self.orderings:
+            raise ValidationError({
+                'ordering': f'Must be one of: {", ".join(self.orderings)}.'
+            })
+
+        return (ordering, 'id' if ordering.startswith('-') else '-id')
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginates recipes from the newest to the oldest, or by search rank"""
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        """Orders search results from the most to the least relevant"""
+        if 'rank' in queryset.query.annotations:
+            return ('-rank', '-id')
+
+        return super().get_ordering(request, queryset, view)
+
+
+def cursor_fields(view, queryset):
+    """Returns the fields a list view reads its pagination cursor from"""
+    if view.paginator is None:
+        return []
+
+    return [
+        name.lstrip('-') for name in view.paginator.get_ordering(
+            view.request,
+            queryset,
+            view
+        )
+    ]
@@ -0,0 +1,200 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core.files import is_content_addressed, lock_content
+from core.models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+# Name: (max width, max height, Pillow format)
+RENDITIONS = {
+    'thumbnail': (150, 150, 'JPEG'),
+    'medium': (800, 800, 'JPEG'),
+    'webp': (800, 800, 'WEBP'),
+}
+
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+
+class RenditionPool:
+    """Generates renditions in a few worker threads with a bounded backlog"""
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """Queues a task, returning False when the backlog is full"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_RENDITION_WORKERS,
+                    thread_name_prefix='renditions'
+                )
+                self._slots = threading.BoundedSemaphore(
+                    settings.IMAGE_RENDITION_WORKERS +
+                    settings.IMAGE_RENDITION_BACKLOG
+                )
+
+        if not self._slots.acquire(blocking=False):
+            return False
+
+        future = self._executor.submit(self._run, fn, *args)
+        future.add_done_callback(lambda future: self._slots.release())
+
+        return True
+
+    def _run(self, fn, *args):
+        """Runs a task, closing the connections its thread opened"""
+        try:
+            fn(*args)
+        finally:
+            connections.close_all()
+
+
+pool = RenditionPool()
+
+
+def rendition_path(name, rendition):
+    """Returns the storage path of a rendition of an image"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    extension = EXTENSIONS[RENDITIONS[rendition][2]]
+
+    return os.path.join(
+        directory,
+        'renditions',
+        f'{stem}_{rendition}.{extension}'
+    )
+
+
+def store(path, content):
+    """Writes a rendition at its path, replacing an existing file in place
+
+    Renditions are shared by the recipes using the same image, so a file
+    being served is swapped for the new one rather than deleted first.
+    """
+    if not default_storage.exists(path):
+        default_storage.save(path, content)
+        return
+
+    try:
+        full_path = default_storage.path(path)
+    except NotImplementedError:
+        # Remote storages have no atomic rename
+        default_storage.delete(path)
+        default_storage.save(path, content)
+        return
+
+    temporary = default_storage.save(f'{path}.tmp', content)
+    os.replace(default_storage.path(temporary), full_path)
+
+
+def render(name, force=False):
+    """Saves every rendition of a stored image, returning their paths
+
+    Images are named by their content, so existing renditions are reused
+    unless force is set. The image's content lock serializes the renderers
+    of the same image, which always write to the same paths, and keeps the
+    image from being collected meanwhile.
+    """
+    largest = (
+        max(width for width, _, _ in RENDITIONS.values()),
+        max(height for _, height, _ in RENDITIONS.values())
+    )
+    paths = {
+        rendition: rendition_path(name, rendition) for rendition in RENDITIONS
+    }
+
+    with transaction.atomic():
+        lock_content(name)
+
+        if not force and all(map(default_storage.exists, paths.values())):
+            return paths
+
+        with default_storage.open(name) as file:
+            with Image.open(file) as image:
+                if image.width * image.height > settings.MAX_IMAGE_PIXELS:
+                    raise Image.DecompressionBombError(
+                        f'{name} has more than {settings.MAX_IMAGE_PIXELS} '
+                        'pixels'
+                    )
+
+                # JPEGs decode at a reduced scale, skipping most pixels
+                image.draft('RGB', largest)
+                image = image.convert('RGB')
+
+        for rendition, (width, height, image_format) in RENDITIONS.items():
+            resized = image.copy()
+            resized.thumbnail((width, height))
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image_format, quality=85)
+
+            store(paths[rendition], ContentFile(buffer.getvalue()))
+
+    return paths
+
+
+def generate_renditions(recipe_id, name, force=False):
+    """Renders an image and records the renditions on its recipe"""
+    try:
+        renditions = render(name, force)
+    except Exception:
+        logger.exception('Could not render the renditions of %s', name)
+        return False
+
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_renditions=renditions,
+        updated_at=timezone.now()
+    )
+
+    if not updated:
+        # The image was replaced while rendering
+        release_image(name)
+
+    return bool(updated)
+
+
+def release_image(name):
+    """Deletes an image and its renditions once no recipe uses it"""
+    def collect():
+        with transaction.atomic():
+            lock_content(name)
+
+            if Recipe.objects.filter(image=name).exists():
+                return
+
+            for path in [name] + [
+                rendition_path(name, rendition) for rendition in RENDITIONS
+            ]:
+                default_storage.delete(path)
+
+    if name and is_content_addressed(name):
+        transaction.on_commit(collect)
+
+
+def queue_renditions(recipe):
+    """Renders the image of a recipe in the background once committed"""
+    recipe_id, name = recipe.pk, recipe.image.name
+
+    def submit():
+        if not pool.submit(generate_renditions, recipe_id, name):
+            logger.warning(
+                'Rendition backlog full, %s left for generate_renditions',
+                name
+            )
+
+    transaction.on_commit(submit)
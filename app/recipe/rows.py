@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from recipe.pagination import cursor_fields
+
+
+# Fields representing the values of the database as they are
+PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+def related_ids(model, field_name, pks):
+    """Groups the IDs related to each object through a many to many field
+
+    The IDs of each object are in ascending order.
+    """
+    field = model._meta.get_field(field_name)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    grouped = defaultdict(list)
+
+    for pk, related_pk in field.remote_field.through.objects.filter(
+        **{f'{source}__in': pks}
+    ).order_by(target).values_list(source, target):
+        grouped[pk].append(related_pk)
+
+    return grouped
+
+
+def plan_fields(serializer):
+    """Plans how each readable field of a serializer is read from a row
+
+    Returns (field name, source, converter, whether it is a relation) for
+    each field in order, or None if any needs the model instance.
+    """
+    if type(serializer).to_representation is not \
+            serializers.Serializer.to_representation:
+        return None
+
+    opts = serializer.Meta.model._meta
+    plan = []
+
+    for field in serializer._readable_fields:
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+        if model_field.many_to_many:
+            if not (
+                isinstance(field, ManyRelatedField) and
+                isinstance(field.child_relation, PrimaryKeyRelatedField) and
+                field.child_relation.pk_field is None
+            ):
+                return None
+
+            plan.append((field.field_name, field.source, None, True))
+        elif model_field.concrete and not model_field.is_relation:
+            convert = (
+                None if type(field) in PLAIN_FIELDS
+                else field.to_representation
+            )
+            plan.append((field.field_name, field.source, convert, False))
+        else:
+            return None
+
+    return plan
+
+
+def represent_rows(model, plan, rows):
+    """Represents .values() rows of a model as planned by plan_fields"""
+    pks = [row['pk'] for row in rows]
+    ids = {
+        source: related_ids(model, source, pks)
+        for _, source, _, relation in plan if relation
+    }
+    data = []
+
+    for row in rows:
+        item = {}
+
+        for field_name, source, convert, relation in plan:
+            if relation:
+                item[field_name] = ids[source].get(row['pk'], [])
+                continue
+
+            value = row[source]
+
+            if convert is None or value is None:
+                item[field_name] = value
+            else:
+                item[field_name] = convert(value)
+
+        data.append(item)
+
+    return data
+
+
+class ValuesListMixin:
+    """Lists from .values() rows, without model instances
+
+    The rows are represented by the fields of the serializer, with the same
+    output. Serializers with fields that need the instances are used as
+    they are.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """Lists the objects, represented straight from their rows"""
+        plan = plan_fields(self.get_serializer())
+
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.prefetch_related(None).values(
+            'pk',
+            *{source for _, source, _, relation in plan if not relation},
+            *cursor_fields(self, queryset)
+        )
+        page = self.paginate_queryset(rows)
+
+        if page is None:
+            page = list(rows)
+
+        data = represent_rows(queryset.model, plan, page)
+
+        if self.paginator is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
@@ -1,9 +1,64 @@
+from collections import Counter, OrderedDict
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
 from rest_framework import serializers
 
 from core.models import Tag, Ingredient, Recipe
 
 
-class TagSerializer(serializers.ModelSerializer):
+class UniqueNameMixin:
+    """Validates the name is not taken by another object of the user"""
+
+    def validate_name(self, value):
+        """Rejects names already used by the authenticated user"""
+        queryset = self.Meta.model.objects.filter(
+            user=self.context['request'].user,
+            name=value
+        )
+
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+
+        if queryset.exists():
+            raise serializers.ValidationError(
+                f'{self.Meta.model.__name__} with this name already exists.'
+            )
+
+        return value
+
+
+class SparseFieldsMixin:
+    """Represents only the fields given in the fields argument, if any"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """Represents the stored renditions of an image by their URLs"""
+
+    def to_representation(self, value):
+        """Maps each rendition name to its absolute URL"""
+        request = self.context.get('request')
+        urls = {}
+
+        for rendition, name in value.items():
+            url = default_storage.url(name)
+            urls[rendition] = (
+                request.build_absolute_uri(url) if request else url
+            )
+
+        return urls
+
+
+class TagSerializer(SparseFieldsMixin, UniqueNameMixin,
+                    serializers.ModelSerializer):
     """Serializer for Tag objects"""
 
     class Meta:
@@ -12,7 +67,8 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(SparseFieldsMixin, UniqueNameMixin,
+                           serializers.ModelSerializer):
     """Serializer for Ingredient objects"""
 
     class Meta:
@@ -21,7 +77,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Recipe objects"""
 
     ingredients = serializers.PrimaryKeyRelatedField(
@@ -32,11 +88,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True,
         queryset=Tag.objects.all()
     )
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'title', 'ingredients',
-                  'tags', 'time_minutes', 'price', 'link')
+        fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes',
+                  'price', 'link', 'image_renditions')
         read_only_fields = ('id',)
 
 
@@ -47,6 +104,124 @@ class RecipeDetailSerializer(RecipeSerializer):
     tags = TagSerializer(many=True, read_only=True)
 
 
+class RecipeBulkListSerializer(serializers.ListSerializer):
+    """Validates and creates many recipes with a fixed number of queries"""
+    max_items = 10000
+    related_models = {'tags': Tag, 'ingredients': Ingredient}
+
+    def to_internal_value(self, data):
+        """Checks every related ID belongs to the user in one query each"""
+        if isinstance(data, list) and len(data) > self.max_items:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    f'Ensure there are no more than {self.max_items} items.'
+                ]
+            })
+
+        items = super().to_internal_value(data)
+        errors = [{} for _ in items]
+
+        for field_name, model in self.related_models.items():
+            ids = {pk for item in items for pk in item.get(field_name, [])}
+            owned = set(model.objects.filter(
+                user=self.context['request'].user,
+                pk__in=ids
+            ).values_list('pk', flat=True))
+
+            for item, item_errors in zip(items, errors):
+                missing = [
+                    pk for pk in item.get(field_name, []) if pk not in owned
+                ]
+
+                if missing:
+                    item_errors[field_name] = [
+                        f'Invalid pk "{pk}" - object does not exist.'
+                        for pk in missing
+                    ]
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return items
+
+    def create(self, validated_data):
+        """Inserts the recipes and then each relation in a single statement"""
+        related = [
+            {
+                field_name: list(dict.fromkeys(item.pop(field_name, [])))
+                for field_name in self.related_models
+            }
+            for item in validated_data
+        ]
+
+        with transaction.atomic():
+            recipes = Recipe.objects.bulk_create(
+                Recipe(**item) for item in validated_data
+            )
+
+            with connection.cursor() as cursor:
+                for field_name in self.related_models:
+                    field = Recipe._meta.get_field(field_name)
+                    recipe_ids, related_ids = [], []
+
+                    for recipe, relations in zip(recipes, related):
+                        pks = relations[field_name]
+                        setattr(recipe, f'bulk_{field_name}', pks)
+                        recipe_ids += [recipe.pk] * len(pks)
+                        related_ids += pks
+
+                    cursor.execute(
+                        f'INSERT INTO {field.m2m_db_table()} '
+                        f'({field.m2m_column_name()}, '
+                        f'{field.m2m_reverse_name()}) '
+                        'SELECT * FROM unnest(%s::bigint[], %s::bigint[])',
+                        [recipe_ids, related_ids]
+                    )
+                    # Raw inserts send no m2m_changed signal
+                    field.related_model.objects.add_recipe_counts(
+                        Counter(related_ids)
+                    )
+
+            Recipe.objects.filter(
+                pk__in=[recipe.pk for recipe in recipes]
+            ).update_search_vector()
+
+        return recipes
+
+
+class RecipeBulkSerializer(serializers.ModelSerializer):
+    """Serializer for each recipe of a bulk creation"""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        write_only=True
+    )
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        write_only=True
+    )
+    image_renditions = ImageRenditionsField()
+
+    class Meta:
+        model = Recipe
+        fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes',
+                  'price', 'link', 'image_renditions')
+        read_only_fields = ('id',)
+        list_serializer_class = RecipeBulkListSerializer
+
+    def to_representation(self, instance):
+        """Represents a created recipe like RecipeSerializer does"""
+        data = super().to_representation(instance)
+        data['ingredients'] = instance.bulk_ingredients
+        data['tags'] = instance.bulk_tags
+
+        return OrderedDict(
+            (field_name, data[field_name]) for field_name in self.Meta.fields
+        )
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to recipes"""
 
@@ -0,0 +1,32 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.cache import bump_generation
+from recipe.renditions import release_image
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Invalidates the cached responses of the owner of a changed object"""
+    bump_generation(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_user_cache_relations(sender, instance, action, **kwargs):
+    """Invalidates the cached responses when recipe relations change"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_generation(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """Deletes the image of a deleted recipe if no other recipe uses it"""
+    release_image(instance.image.name)
@@ -0,0 +1,68 @@
+"""Benchmarks for the Recipes API
+
+They are not collected by the default test run. To run them:
+
+    python manage.py test recipe.tests.benchmarks --pattern="bench_*.py"
+"""
+import time
+from statistics import median
+
+from django.db import connection
+
+from core.models import Recipe
+
+
+def measure(func, repeat=20):
+    """Returns the median duration of calling func in milliseconds"""
+    durations = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return median(durations)
+
+
+def report(title, rows):
+    """Prints a benchmark result table"""
+    print(f'\n{title}')
+
+    for label, duration in rows:
+        print(f'  {label:>24}: {duration:8.2f} ms')
+
+
+def analyze():
+    """Refreshes the planner statistics after seeding data"""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def seed_recipes(user, count, tags=(), ingredients=(), every=1):
+    """Creates count recipes, relating every nth one to tags/ingredients"""
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'Benchmark recipe {i}',
+            time_minutes=10,
+            price=5.00
+        )
+        for i in range(count)
+    )
+    related = [r for i, r in enumerate(recipes) if i % every == 0]
+
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in related
+        for tag in tags
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(
+            recipe_id=recipe.id,
+            ingredient_id=ingredient.id
+        )
+        for recipe in related
+        for ingredient in ingredients
+    )
+
+    return recipes
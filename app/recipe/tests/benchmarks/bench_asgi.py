@@ -0,0 +1,133 @@
+"""Compares the WSGI and ASGI request paths under concurrent load
+
+Both paths serve the same committed dataset in process: WSGI through the
+test client in a pool of threads, as a threaded WSGI server would, and
+ASGI through the async test client with every request in flight at once.
+For numbers including the servers, run `gunicorn api.wsgi` and
+`gunicorn -k uvicorn.workers.UvicornWorker api.asgi` against the same
+database and load them with a tool like wrk.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client, TransactionTestCase, \
+    override_settings
+from django.urls import include, path, reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Tag, Ingredient
+
+from recipe import views
+from recipe.async_views import AsyncReadRouter
+from recipe.tests.benchmarks import analyze, seed_recipes
+
+
+with override_settings(ASYNC_VIEWS=True):
+    router = AsyncReadRouter()
+    router.register('tags', views.TagViewSet)
+    router.register('ingredients', views.IngredientViewSet)
+    router.register('recipes', views.RecipeViewSet)
+
+    urlpatterns = [
+        path('api/recipe/', include((router.urls, 'recipe')))
+    ]
+
+
+class ServerPathBenchmark(TransactionTestCase):
+    """Measures throughput and tail latency of WSGI and ASGI"""
+
+    concurrency = 32
+    requests = 640
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'bench@mail.com',
+            'benchpass'
+        )
+        self.token = Token.objects.create(user=self.user).key
+
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(3)
+        ]
+        seed_recipes(self.user, 5000, tags, ingredients)
+        analyze()
+
+    def urls(self):
+        """Returns the URLs requested, cycling over list and detail"""
+        recipes = reverse('recipe:recipe-list')
+        first = self.client.get(
+            recipes,
+            HTTP_AUTHORIZATION=f'Token {self.token}'
+        ).data['results']
+        urls = [
+            recipes,
+            reverse('recipe:tag-list'),
+            reverse('recipe:recipe-detail', args=[first[0]['id']]),
+        ]
+
+        return [urls[i % len(urls)] for i in range(self.requests)]
+
+    def run_wsgi(self, urls):
+        """Sends the requests through WSGI from a pool of threads"""
+        client = Client(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+        def get(url):
+            start = time.perf_counter()
+            assert client.get(url).status_code == 200
+
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(get, urls))
+
+    def run_asgi(self, urls):
+        """Sends the requests through ASGI, a fixed number at a time"""
+        client = AsyncClient()
+
+        async def get(url, slots):
+            async with slots:
+                start = time.perf_counter()
+                res = await client.get(
+                    url,
+                    authorization=f'Token {self.token}'
+                )
+                assert res.status_code == 200
+
+                return time.perf_counter() - start
+
+        async def run():
+            slots = asyncio.Semaphore(self.concurrency)
+
+            return await asyncio.gather(*(get(url, slots) for url in urls))
+
+        with override_settings(ROOT_URLCONF=__name__):
+            return asyncio.run(run())
+
+    def test_wsgi_against_asgi(self):
+        """should report the throughput and latencies of both paths"""
+        urls = self.urls()
+        print(
+            f'\nWSGI against ASGI, {self.requests} requests, '
+            f'{self.concurrency} concurrent'
+        )
+
+        for label, run in (('WSGI', self.run_wsgi), ('ASGI', self.run_asgi)):
+            start = time.perf_counter()
+            latencies = run(urls)
+            elapsed = time.perf_counter() - start
+            cuts = quantiles(latencies, n=100)
+
+            print(
+                f'  {label}: {len(latencies) / elapsed:8.1f} req/s, '
+                f'p50 {cuts[49] * 1000:7.2f} ms, '
+                f'p99 {cuts[98] * 1000:7.2f} ms'
+            )
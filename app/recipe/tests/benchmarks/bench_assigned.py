@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import Tag, Ingredient
+
+from recipe.filters import assigned_exists
+from recipe.tests.benchmarks import analyze, measure, report, seed_recipes
+
+
+class AssignedOnlyBenchmark(TestCase):
+    """Measures assigned_only as the number of recipes per tag grows"""
+
+    sizes = (100, 1000, 10000, 50000)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'bench@mail.com',
+            'benchpass'
+        )
+
+        # A few tags used by every recipe, most never used
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(50)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(50)
+        ]
+
+    def test_assigned_only(self):
+        """should report the latency for each number of recipes per tag"""
+        # Querysets, the list responses themselves are cached
+        cases = {
+            'tags, join + distinct': Tag.objects.filter(
+                recipe__isnull=False
+            ).distinct(),
+            'tags, exists': Tag.objects.filter(assigned_exists(Tag)),
+            'ingredients, exists': Ingredient.objects.filter(
+                assigned_exists(Ingredient)
+            ),
+        }
+        seeded = 0
+
+        for size in self.sizes:
+            seed_recipes(
+                self.user,
+                size - seeded,
+                tags=self.tags[:5],
+                ingredients=self.ingredients[:5]
+            )
+            seeded = size
+            analyze()
+
+            report(f'assigned_only with {size} recipes per tag', [
+                (label, measure(lambda: list(
+                    queryset.filter(user=self.user).order_by('-name', 'id')
+                )))
+                for label, queryset in cases.items()
+            ])
@@ -0,0 +1,75 @@
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Tag
+
+from recipe.filters import autocomplete
+from recipe.tests.benchmarks import analyze, measure, report
+
+
+AUTOCOMPLETE_TAGS_URL = reverse('recipe:tag-autocomplete')
+
+WORDS = (
+    'apple', 'basil', 'carrot', 'dill', 'egg', 'fennel', 'garlic', 'honey',
+    'lemon', 'mint', 'onion', 'pepper', 'rice', 'salt', 'tomato', 'yogurt',
+)
+
+
+class AutocompleteBenchmark(TestCase):
+    """Measures tag autocompletion for a user with 100k tags"""
+
+    size = 100000
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bench@mail.com',
+            'benchpass'
+        )
+        self.client.force_authenticate(self.user)
+
+        names = (
+            f'{first.title()} {second} {i}'
+            for i, (first, second) in enumerate(
+                itertools.islice(
+                    itertools.cycle(itertools.product(WORDS, WORDS)),
+                    self.size
+                )
+            )
+        )
+        Tag.objects.bulk_create(
+            (Tag(user=self.user, name=name) for name in names),
+            batch_size=10000
+        )
+        analyze()
+
+    def test_autocomplete(self):
+        """should report the latency of prefixes of growing length"""
+        cases = {
+            '1 character': 'b',
+            '3 characters': 'bas',
+            'word + space': 'basil m',
+            'no prefix match': 'basli',
+        }
+
+        report(f'Tag autocomplete with {self.size} tags', [
+            (label, measure(lambda: self.client.get(
+                AUTOCOMPLETE_TAGS_URL,
+                {'q': q}
+            )))
+            for label, q in cases.items()
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            autocomplete(Tag.objects.filter(user=self.user), 'bas', 10)
+
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ANALYZE ' + queries[0]['sql'])
+            print('\n'.join(row[0] for row in cursor.fetchall()))
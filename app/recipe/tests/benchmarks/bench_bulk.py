@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+
+from recipe.tests.benchmarks import report
+
+
+BULK_RECIPES_URL = reverse('recipe:recipe-bulk-create')
+
+
+class RecipeBulkCreateBenchmark(TestCase):
+    """Measures the bulk creation of recipes"""
+
+    sizes = (1000, 10000)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bench@mail.com',
+            'benchpass'
+        )
+        self.client.force_authenticate(self.user)
+
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(10)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(10)
+        ]
+
+    def test_bulk_create(self):
+        """should report the duration of each bulk creation size"""
+        rows = []
+
+        for size in self.sizes:
+            payload = [
+                {
+                    'title': f'Recipe {i}',
+                    'time_minutes': 10,
+                    'price': '5.00',
+                    'tags': [tag.id for tag in self.tags[i % 10:][:3]],
+                    'ingredients': [
+                        ing.id for ing in self.ingredients[i % 10:][:3]
+                    ]
+                }
+                for i in range(size)
+            ]
+
+            start = time.perf_counter()
+            res = self.client.post(BULK_RECIPES_URL, payload, format='json')
+            rows.append((
+                f'{size} recipes',
+                (time.perf_counter() - start) * 1000
+            ))
+
+            self.assertEqual(res.status_code, 201)
+
+        report('Recipe bulk creation', rows)
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+
+from recipe.tests.benchmarks import analyze, measure, report, seed_recipes
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class RecipeFilterBenchmark(TestCase):
+    """Measures the recipe filters as the number of recipes grows"""
+
+    sizes = (1000, 10000, 50000)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bench@mail.com',
+            'benchpass'
+        )
+        self.client.force_authenticate(self.user)
+
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Thai', 'Spicy', 'Vegan')
+        ]
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Rice'
+        )
+
+    def test_filter_recipes(self):
+        """should report the filter latency for each data size"""
+        tag_ids = ','.join(str(tag.id) for tag in self.tags[:2])
+        cases = {
+            'any': {'tags': tag_ids},
+            'all': {'tags': tag_ids, 'tags_mode': 'all'},
+            'all + ingredients': {
+                'tags': tag_ids,
+                'tags_mode': 'all',
+                'ingredients': self.ingredient.id
+            },
+        }
+        seeded = 0
+
+        for size in self.sizes:
+            seed_recipes(
+                self.user,
+                size - seeded,
+                tags=self.tags,
+                ingredients=[self.ingredient],
+                every=7
+            )
+            seeded = size
+            analyze()
+
+            report(f'Recipe filters with {size} recipes', [
+                (label, measure(lambda: self.client.get(RECIPES_URL, params)))
+                for label, params in cases.items()
+            ])
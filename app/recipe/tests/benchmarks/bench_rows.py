@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import RequestFactory, TestCase
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.rows import plan_fields, represent_rows
+from recipe.serializers import RecipeSerializer, TagSerializer
+from recipe.tests.benchmarks import analyze, measure, report, seed_recipes
+
+
+class ValuesListBenchmark(TestCase):
+    """Measures listing from rows against listing with the serializers"""
+
+    sizes = (1000, 10000)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'bench@mail.com',
+            'benchpass'
+        )
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(5)
+        ]
+        self.context = {'request': RequestFactory().get('/')}
+
+    def serialize(self, serializer_class, queryset, *lookups):
+        """Represents the objects with the serializer, prefetching lookups"""
+        queryset = queryset.prefetch_related(*(
+            Prefetch(lookup, queryset=model.objects.order_by('pk'))
+            for lookup, model in lookups
+        ))
+
+        return serializer_class(
+            queryset,
+            many=True,
+            context=self.context
+        ).data
+
+    def represent(self, serializer_class, queryset):
+        """Represents the objects from their rows"""
+        plan = plan_fields(serializer_class(context=self.context))
+        rows = queryset.values(
+            'pk',
+            *{source for _, source, _, relation in plan if not relation}
+        )
+
+        return represent_rows(queryset.model, plan, list(rows))
+
+    def test_list(self):
+        """should report the time to represent each number of objects"""
+        seeded = 0
+
+        for size in self.sizes:
+            seed_recipes(
+                self.user,
+                size - seeded,
+                tags=self.tags,
+                ingredients=self.ingredients
+            )
+            Tag.objects.bulk_create(
+                Tag(user=self.user, name=f'Seeded tag {i}')
+                for i in range(seeded, size)
+            )
+            seeded = size
+            analyze()
+
+            recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+            tags = Tag.objects.filter(user=self.user).order_by('-name', 'id')
+
+            self.assertEqual(
+                self.represent(RecipeSerializer, recipes),
+                self.serialize(
+                    RecipeSerializer,
+                    recipes,
+                    ('tags', Tag),
+                    ('ingredients', Ingredient)
+                )
+            )
+
+            report(f'Listing {size} objects', [
+                ('recipes, serializer', measure(lambda: self.serialize(
+                    RecipeSerializer,
+                    recipes,
+                    ('tags', Tag),
+                    ('ingredients', Ingredient)
+                ), repeat=5)),
+                ('recipes, rows', measure(
+                    lambda: self.represent(RecipeSerializer, recipes),
+                    repeat=5
+                )),
+                ('tags, serializer', measure(
+                    lambda: self.serialize(TagSerializer, tags),
+                    repeat=5
+                )),
+                ('tags, rows', measure(
+                    lambda: self.represent(TagSerializer, tags),
+                    repeat=5
+                )),
+            ])
@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import threading
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.test.client import AsyncRequestFactory
+
+from recipe import views
+from recipe.async_views import AsyncReadRouter, async_view
+
+
+request_id = contextvars.ContextVar('request_id', default='none')
+
+
+def sample_view(request):
+    """Answers with the context variable and the thread running the view"""
+    return HttpResponse(
+        f'{request_id.get()} {threading.current_thread().name}'
+    )
+
+
+class AsyncViewTests(SimpleTestCase):
+    """Tests running sync views from async ones"""
+
+    def test_async_view_runs_in_pool(self):
+        """should run the view in a worker with the caller context"""
+        view = async_view(sample_view)
+        request = AsyncRequestFactory().get('/')
+
+        async def call():
+            request_id.set('abc')
+
+            return await view(request)
+
+        res = asyncio.run(call())
+        value, thread_name = res.content.decode().split()
+
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertEqual(value, 'abc')
+        self.assertTrue(thread_name.startswith('views'))
+
+    def test_router_wraps_read_routes(self):
+        """should only make the list and detail routes async"""
+        with override_settings(ASYNC_VIEWS=True):
+            router = AsyncReadRouter()
+            router.register('recipes', views.RecipeViewSet)
+            urls = {
+                url.name: asyncio.iscoroutinefunction(url.callback)
+                for url in router.urls
+            }
+
+        self.assertTrue(urls['recipe-list'])
+        self.assertTrue(urls['recipe-detail'])
+        self.assertFalse(urls['recipe-export'])
+        self.assertFalse(urls['recipe-upload-image'])
+
+    def test_router_sync_by_default(self):
+        """should keep every route sync unless async views are on"""
+        router = AsyncReadRouter()
+        router.register('recipes', views.RecipeViewSet)
+
+        self.assertFalse(any(
+            asyncio.iscoroutinefunction(url.callback) for url in router.urls
+        ))
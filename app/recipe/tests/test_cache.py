@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.cache import stats
+
+
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class ResponseCacheTests(TestCase):
+    """Tests the cached tag and ingredient list responses"""
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """should serve a repeated list request without queries"""
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        first = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(TAGS_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_list_cached_per_params(self):
+        """should cache the assigned_only responses separately"""
+        Ingredient.objects.create(user=self.user, name="Salt")
+
+        self.client.get(INGREDIENTS_URL)
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 0)
+
+    def test_list_invalidated_on_change(self):
+        """should drop cached lists when the user changes any object"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Salad",
+            time_minutes=5,
+            price=5.00
+        )
+        recipe.tags.add(tag)
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+
+    def test_list_cached_per_user(self):
+        """should not share cached lists between users"""
+        user2 = get_user_model().objects.create_user(
+            "other@mail.com",
+            "testpass"
+        )
+        Tag.objects.create(user=user2, name="Fruit")
+        self.client.get(TAGS_URL)
+
+        self.client.force_authenticate(user2)
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['name'], "Fruit")
+
+    def test_list_not_modified(self):
+        """should answer 304 without queries while the list is unchanged"""
+        res = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(0):
+            res_cached = self.client.get(
+                TAGS_URL,
+                HTTP_IF_NONE_MATCH=res['ETag']
+            )
+
+        self.assertEqual(res_cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cache_stats(self):
+        """should count the cache hits and misses"""
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+        self.client.get(INGREDIENTS_URL)
+
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+
+        self.assertEqual(stats(), {'hits': 1, 'misses': 2})
+        self.assertIn('Hits: 1', out.getvalue())
@@ -11,6 +11,7 @@ from recipe.serializers import IngredientSerializer
 
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
+AUTOCOMPLETE_INGREDIENTS_URL = reverse("recipe:ingredient-autocomplete")
 
 
 class PublicIngredientsAPITests(TestCase):
@@ -45,11 +46,11 @@ class PrivateIngredientsAPITests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL)
 
-        ingredients = Ingredient.objects.all().order_by('-name')
+        ingredients = Ingredient.objects.all().order_by('-name', 'id')
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """should only return the ingredients of a specific user"""
@@ -64,8 +65,8 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_create_ingredients_successful(self):
         """should create ingredient successfully with valid data"""
@@ -80,6 +81,18 @@ class PrivateIngredientsAPITests(TestCase):
 
         self.assertTrue(exists)
 
+    def test_create_ingredient_duplicate_name(self):
+        """should not allow two ingredients with the same name for a user"""
+        Ingredient.objects.create(user=self.user, name="Sugar")
+
+        res = self.client.post(INGREDIENTS_URL, {"name": "Sugar"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user, name="Sugar").count(),
+            1
+        )
+
     def test_create_ingredients_invalid(self):
         """should fail creating an ingredient with invalid data"""
         payload = {"name": ""}
@@ -106,8 +119,8 @@ class PrivateIngredientsAPITests(TestCase):
         serializer1 = IngredientSerializer(ingredient1)
         serializer2 = IngredientSerializer(ingredient2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_ingredients_assigned_unique(self):
         """should return unique assigned ingredients"""
@@ -132,4 +145,14 @@ class PrivateIngredientsAPITests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_autocomplete_ingredients(self):
+        """should suggest the ingredients starting with q"""
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+        Ingredient.objects.create(user=self.user, name="Pepper")
+
+        res = self.client.get(AUTOCOMPLETE_INGREDIENTS_URL, {'q': 'sa'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': salt.id, 'name': "Salt"}])
@@ -1,10 +1,15 @@
 import tempfile
+import json
 import os
 
+from unittest.mock import patch
+
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -12,9 +17,13 @@ from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
 
+from recipe.renditions import generate_renditions
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BULK_RECIPES_URL = reverse('recipe:recipe-bulk-create')
+EXPORT_RECIPES_URL = reverse('recipe:recipe-export')
 
 
 def image_upload_url(recipe_id):
@@ -82,11 +91,11 @@ class PrivateRecipeAPITests(TestCase):
 
         res = self.client.get(RECIPES_URL)
 
-        recipes = Recipe.objects.all().order_by('id')
+        recipes = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """should retrieve a list of recipes from a specific user"""
@@ -104,8 +113,61 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_retrieve_recipes_constant_queries(self):
+        """should not run extra queries for each listed recipe"""
+        for i in range(5):
+            recipe = sample_recipe(user=self.user, title=f"Recipe {i}")
+            recipe.tags.add(sample_tag(user=self.user, name=f"Tag {i}"))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f"Ingredient {i}")
+            )
+
+        # Conditional GET fingerprint, recipes, then one per relation
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_paginate_recipes_with_cursor(self):
+        """should walk through the recipes page by page from the newest"""
+        recipes = [
+            sample_recipe(user=self.user, title=f"Recipe {i}")
+            for i in range(5)
+        ]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_view_recipe_detail_constant_queries(self):
+        """should load the nested tags and ingredients in fixed queries"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(
+            sample_tag(user=self.user, name="Vegan"),
+            sample_tag(user=self.user, name="Dessert")
+        )
+        recipe.ingredients.add(
+            sample_ingredient(user=self.user, name="Sugar"),
+            sample_ingredient(user=self.user, name="Flour")
+        )
+
+        # Conditional GET fingerprint, recipe, then one per relation
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 2)
+        self.assertEqual(len(res.data['ingredients']), 2)
 
     def test_view_recipe_detail(self):
         """should retrieve a recipe detail view"""
@@ -204,9 +266,9 @@ class PrivateRecipeAPITests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         """should return recipes with given ingredients"""
@@ -230,9 +292,482 @@ class PrivateRecipeAPITests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+    def test_filter_recipes_by_tags_and_ingredients_unique(self):
+        """should return each matching recipe once when combining filters"""
+        recipe = sample_recipe(user=self.user, title="Pad Thai")
+        tags = [
+            sample_tag(user=self.user, name="Thai"),
+            sample_tag(user=self.user, name="Noodles")
+        ]
+        ingredients = [
+            sample_ingredient(user=self.user, name="Rice noodles"),
+            sample_ingredient(user=self.user, name="Peanuts")
+        ]
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': ','.join(str(tag.id) for tag in tags),
+            'ingredients': ','.join(str(ing.id) for ing in ingredients)
+        })
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['id'], recipe.id)
+
+    def test_filter_recipes_by_all_tags(self):
+        """should return only recipes having every given tag"""
+        recipe1 = sample_recipe(user=self.user, title="Green Curry")
+        recipe2 = sample_recipe(user=self.user, title="Margherita")
+
+        tag1 = sample_tag(user=self.user, name="Spicy")
+        tag2 = sample_tag(user=self.user, name="Vegan")
+
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(
+            RECIPES_URL,
+            {'tags': f'{tag1.id},{tag2.id}', 'tags_mode': 'all'}
+        )
+
+        serializer1 = RecipeSerializer(recipe1)
+        serializer2 = RecipeSerializer(recipe2)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
+
+    def test_filter_recipes_invalid_params(self):
+        """should fail filtering with an invalid mode or invalid IDs"""
+        tag = sample_tag(user=self.user)
+
+        res_mode = self.client.get(
+            RECIPES_URL,
+            {'tags': tag.id, 'tags_mode': 'some'}
+        )
+        res_ids = self.client.get(RECIPES_URL, {'ingredients': '1,salt'})
+
+        self.assertEqual(res_mode.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res_ids.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeSearchAPITests(TestCase):
+    """Tests the full text search of recipes API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_search_recipes_by_title(self):
+        """should return only the recipes matching the search terms"""
+        recipe1 = sample_recipe(user=self.user, title="Chicken Curry")
+        sample_recipe(user=self.user, title="Lasagna")
+
+        res = self.client.get(RECIPES_URL, {'search': 'curry'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipe1.id]
+        )
+
+    def test_search_recipes_ranked(self):
+        """should match tag and ingredient names, title matches first"""
+        recipe1 = sample_recipe(user=self.user, title="Roasted pumpkin")
+        recipe2 = sample_recipe(user=self.user, title="Soup")
+        recipe3 = sample_recipe(user=self.user, title="Pie")
+        sample_recipe(user=self.user, title="Lasagna")
+
+        recipe2.tags.add(sample_tag(user=self.user, name="Pumpkin"))
+        recipe3.ingredients.add(
+            sample_ingredient(user=self.user, name="Pumpkin")
+        )
+
+        res = self.client.get(RECIPES_URL, {'search': 'pumpkin'})
+        ids = [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(ids[0], recipe1.id)
+        self.assertCountEqual(ids, [recipe1.id, recipe2.id, recipe3.id])
+
+    def test_search_recipes_paginated(self):
+        """should walk through the ranked results without repetitions"""
+        recipes = [
+            sample_recipe(user=self.user, title=title)
+            for title in ("Curry", "Green curry", "Curry with curry rice")
+        ]
+
+        res = self.client.get(RECIPES_URL, {'search': 'curry', 'page_size': 1})
+        ids = [recipe['id'] for recipe in res.data['results']]
+
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertCountEqual(ids, [recipe.id for recipe in recipes])
+
+    def test_search_follows_tag_rename(self):
+        """should find recipes by the current name of their tags"""
+        recipe = sample_recipe(user=self.user, title="Feijoada")
+        tag = sample_tag(user=self.user, name="Brazilian")
+        recipe.tags.add(tag)
+
+        tag.name = "Traditional"
+        tag.save()
+
+        res_old = self.client.get(RECIPES_URL, {'search': 'brazilian'})
+        res_new = self.client.get(RECIPES_URL, {'search': 'traditional'})
+
+        self.assertEqual(len(res_old.data['results']), 0)
+        self.assertEqual(len(res_new.data['results']), 1)
+
+
+class RecipeSparseFieldsetTests(TestCase):
+    """Tests limiting the recipe fields with the fields query param"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user, link="https://a.b/c")
+        self.recipe.tags.add(sample_tag(user=self.user))
+        self.recipe.ingredients.add(sample_ingredient(user=self.user))
+
+    def test_list_requested_fields(self):
+        """should only represent and load the requested fields"""
+        # Conditional GET fingerprint, then recipes without relations
+        with self.assertNumQueries(2), \
+                CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'title, id'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': self.recipe.id, 'title': self.recipe.title}
+        ])
+        self.assertNotIn('"core_recipe"."link"', queries[1]['sql'])
+
+    def test_list_skips_unrepresented_columns(self):
+        """should not load the columns no field represents"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('"core_recipe"."link"', queries[1]['sql'])
+        self.assertNotIn('"core_recipe"."image"', queries[1]['sql'])
+        self.assertNotIn('"core_recipe"."search_vector"', queries[1]['sql'])
+
+    def test_search_requested_fields(self):
+        """should rank and paginate search results with any fields"""
+        res = self.client.get(
+            RECIPES_URL,
+            {'search': 'delicious', 'fields': 'tags', 'page_size': 1}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'tags': [tag.id for tag in self.recipe.tags.all()]}
+        ])
+
+    def test_retrieve_requested_fields(self):
+        """should represent the requested fields of a recipe"""
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            {'fields': 'title,tags'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'title': self.recipe.title,
+            'tags': [{'id': tag.id, 'name': tag.name}
+                     for tag in self.recipe.tags.all()]
+        })
+
+    def test_export_requested_fields(self):
+        """should export the requested fields of every recipe"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                EXPORT_RECIPES_URL,
+                {'fields': 'id,ingredients'}
+            )
+            lines = b''.join(res.streaming_content).decode().splitlines()
+
+        ingredient = self.recipe.ingredients.get()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            'id': self.recipe.id,
+            'ingredients': [{'id': ingredient.id, 'name': ingredient.name}]
+        }])
+        # The recipes, then their ingredients only
+        self.assertEqual(len(queries), 2)
+
+    def test_invalid_fields(self):
+        """should reject fields the recipes do not have"""
+        for fields in ('title,user', ''):
+            res = self.client.get(RECIPES_URL, {'fields': fields})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('fields', res.data)
+
+
+class RecipeConditionalGetTests(TestCase):
+    """Tests the conditional GET requests of recipes API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+
+    def test_list_not_modified(self):
+        """should answer 304 from one query when the list is unchanged"""
+        res = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            res_cached = self.client.get(
+                RECIPES_URL,
+                HTTP_IF_NONE_MATCH=res['ETag']
+            )
+
+        self.assertEqual(res_cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_modified(self):
+        """should return the list again after a recipe changes"""
+        res = self.client.get(RECIPES_URL)
+
+        self.recipe.tags.add(sample_tag(user=self.user))
+        res_changed = self.client.get(
+            RECIPES_URL,
+            HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(res_changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res_changed['ETag'], res['ETag'])
+
+    def test_list_modified_after_delete(self):
+        """should return the list again after a recipe is deleted"""
+        sample_recipe(user=self.user, title="Another recipe")
+        res = self.client.get(RECIPES_URL)
+
+        self.recipe.delete()
+        res_changed = self.client.get(
+            RECIPES_URL,
+            HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(res_changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res_changed.data['results']), 1)
+
+    def test_detail_not_modified_since(self):
+        """should answer 304 when the recipe did not change since then"""
+        res = self.client.get(detail_url(self.recipe.id))
+
+        res_cached = self.client.get(
+            detail_url(self.recipe.id),
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified']
+        )
+
+        self.assertEqual(res_cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_on_tag_rename(self):
+        """should return the recipe again after one of its tags is renamed"""
+        tag = sample_tag(user=self.user)
+        self.recipe.tags.add(tag)
+        res = self.client.get(detail_url(self.recipe.id))
+
+        tag.name = "Starter"
+        tag.save()
+        res_changed = self.client.get(
+            detail_url(self.recipe.id),
+            HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(res_changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(res_changed.data['tags'][0]['name'], "Starter")
+
+
+class RecipeBulkCreateAPITests(TestCase):
+    """Tests the bulk creation of recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = sample_tag(user=self.user)
+        self.ingredient = sample_ingredient(user=self.user)
+
+    def sample_payload(self, count):
+        """Returns the payload to bulk create count recipes"""
+        return [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10,
+                "price": "5.00",
+                "tags": [self.tag.id],
+                "ingredients": [self.ingredient.id]
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create_recipes(self):
+        """should create every recipe with its tags and ingredients"""
+        res = self.client.post(
+            BULK_RECIPES_URL,
+            self.sample_payload(3),
+            format='json'
+        )
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, RecipeSerializer(recipes, many=True).data)
+        self.assertEqual(recipes.count(), 3)
+
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(
+                list(recipe.ingredients.all()),
+                [self.ingredient]
+            )
+
+    def test_bulk_create_counts_recipes(self):
+        """should count the created recipes on their tags and ingredients"""
+        self.client.post(
+            BULK_RECIPES_URL,
+            self.sample_payload(3),
+            format='json'
+        )
+
+        self.tag.refresh_from_db()
+        self.ingredient.refresh_from_db()
+
+        self.assertEqual(self.tag.recipe_count, 3)
+        self.assertEqual(self.ingredient.recipe_count, 3)
+
+    def test_bulk_create_constant_queries(self):
+        """should not run extra queries for each created recipe"""
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(
+                BULK_RECIPES_URL,
+                self.sample_payload(2),
+                format='json'
+            )
+
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(
+                BULK_RECIPES_URL,
+                self.sample_payload(50),
+                format='json'
+            )
+
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(Recipe.objects.count(), 52)
+
+    def test_bulk_create_reports_item_errors(self):
+        """should create nothing and report the errors of each item"""
+        user2 = get_user_model().objects.create_user(
+            "other@mail.com",
+            "otherpass"
+        )
+        other_tag = sample_tag(user=user2)
+        payload = self.sample_payload(3)
+        payload[1]['title'] = ""
+        payload[2]['tags'] = [other_tag.id]
+
+        res = self.client.post(BULK_RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+        self.assertEqual(Recipe.objects.count(), 0)
+
+        payload[1]['title'] = "Fixed"
+        res = self.client.post(BULK_RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data[2]), ['tags'])
+        self.assertEqual(Recipe.objects.count(), 0)
+
+
+class RecipeExportAPITests(TestCase):
+    """Tests the streaming export of recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+    def export(self):
+        """Returns the exported recipes, one per line"""
+        res = self.client.get(EXPORT_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+
+        return [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).decode().splitlines()
+        ]
+
+    def test_export_recipes(self):
+        """should stream every recipe of the user with tags and ingredients"""
+        user2 = get_user_model().objects.create_user(
+            "other@mail.com",
+            "otherpass"
+        )
+        sample_recipe(user=user2)
+        recipe1 = sample_recipe(user=self.user, title="Burger")
+        recipe1.tags.add(sample_tag(user=self.user))
+        recipe1.ingredients.add(sample_ingredient(user=self.user))
+        recipe2 = sample_recipe(user=self.user, title="Salad")
+
+        recipes = Recipe.objects.filter(pk__in=[recipe1.pk, recipe2.pk])
+        serializer = RecipeDetailSerializer(recipes.order_by('id'), many=True)
+
+        self.assertEqual(
+            self.export(),
+            json.loads(json.dumps(serializer.data))
+        )
+
+    def test_export_recipes_in_chunks(self):
+        """should prefetch the relations of each chunk in a fixed number of
+        queries"""
+        tag = sample_tag(user=self.user)
+
+        for i in range(5):
+            sample_recipe(user=self.user, title=f"Recipe {i}").tags.add(tag)
+
+        with patch.object(RecipeViewSet, 'export_chunk_size', 2), \
+                CaptureQueriesContext(connection) as queries:
+            exported = self.export()
+
+        self.assertEqual(
+            [recipe['title'] for recipe in exported],
+            [f"Recipe {i}" for i in range(5)]
+        )
+        self.assertTrue(all(
+            recipe['tags'] == [{'id': tag.id, 'name': tag.name}]
+            for recipe in exported
+        ))
+        # The recipes query, then tags and ingredients for each of 3 chunks
+        self.assertEqual(len(queries), 1 + 3 * 2)
 
 
 class RecipeImageUploadTests(TestCase):
@@ -267,6 +802,32 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_queues_renditions(self):
+        """should render the renditions after the response is committed"""
+        url = image_upload_url(self.recipe.id)
+
+        with tempfile.NamedTemporaryFile(suffix='.jpeg') as ntf:
+            img = Image.new('RGB', (10, 10))
+            img.save(ntf, format='JPEG')
+            ntf.seek(0)
+
+            with patch('recipe.renditions.pool.submit') as submit, \
+                    self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    url,
+                    {'image': ntf},
+                    format='multipart'
+                )
+
+        self.recipe.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        submit.assert_called_once_with(
+            generate_renditions,
+            self.recipe.id,
+            self.recipe.image.name
+        )
+
     def test_upload_image_bad_request(self):
         """should fail for a bad image request"""
 
@@ -0,0 +1,222 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.files import lock_content
+from core.models import Recipe
+
+from recipe.renditions import RenditionPool, generate_renditions
+
+
+def sample_image(size, image_format='JPEG'):
+    """Returns the content of a sample image"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, format=image_format)
+
+    return ContentFile(buffer.getvalue())
+
+
+class RenditionTests(TestCase):
+    """Tests the generation of the resized recipe images"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Pancakes",
+            time_minutes=10,
+            price=5.00
+        )
+        self.recipe.image.save('pancakes.jpg', sample_image((2000, 1000)))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_generate_renditions(self):
+        """should store each rendition within its bounds"""
+        self.assertTrue(
+            generate_renditions(self.recipe.id, self.recipe.image.name)
+        )
+
+        self.recipe.refresh_from_db()
+        renditions = self.recipe.image_renditions
+
+        self.assertEqual(set(renditions), {'thumbnail', 'medium', 'webp'})
+
+        with default_storage.open(renditions['thumbnail']) as file:
+            self.assertEqual(Image.open(file).size, (150, 75))
+
+        with default_storage.open(renditions['webp']) as file:
+            image = Image.open(file)
+            self.assertEqual((image.format, image.size), ('WEBP', (800, 400)))
+
+    def test_generate_renditions_of_replaced_image(self):
+        """should not record renditions of an image no longer used"""
+        name = self.recipe.image.name
+        self.recipe.image.save('waffles.png', sample_image((50, 50), 'PNG'))
+
+        self.assertFalse(generate_renditions(self.recipe.id, name))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_renditions, {})
+
+    def test_generate_renditions_again(self):
+        """should replace the renditions in place when forced"""
+        generate_renditions(self.recipe.id, self.recipe.image.name)
+        self.recipe.refresh_from_db()
+        renditions = self.recipe.image_renditions
+
+        generate_renditions(self.recipe.id, self.recipe.image.name, True)
+        self.recipe.refresh_from_db()
+
+        self.assertEqual(self.recipe.image_renditions, renditions)
+        self.assertCountEqual(
+            os.listdir(os.path.dirname(default_storage.path(
+                renditions['thumbnail']
+            ))),
+            [os.path.basename(path) for path in renditions.values()]
+        )
+
+    def test_recipe_detail_rendition_urls(self):
+        """should list the rendition URLs once they are ready"""
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+
+        res = self.client.get(url)
+        self.assertEqual(res.data['image_renditions'], {})
+
+        generate_renditions(self.recipe.id, self.recipe.image.name)
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(
+            res.data['image_renditions']['medium'].startswith(
+                'http://testserver/media/uploads/recipe/renditions/'
+            )
+        )
+
+    def test_generate_renditions_command(self):
+        """should render the images missing renditions"""
+        out = io.StringIO()
+        call_command('generate_renditions', stdout=out)
+
+        self.recipe.refresh_from_db()
+
+        self.assertIn('Rendered 1 images', out.getvalue())
+        self.assertEqual(len(self.recipe.image_renditions), 3)
+
+    @override_settings(IMAGE_RENDITION_WORKERS=1, IMAGE_RENDITION_BACKLOG=1)
+    def test_pool_bounded(self):
+        """should refuse tasks beyond the workers and the backlog"""
+        pool = RenditionPool()
+        release = threading.Event()
+
+        self.assertTrue(pool.submit(release.wait))
+        self.assertTrue(pool.submit(release.wait))
+        self.assertFalse(pool.submit(release.wait))
+
+        release.set()
+        # A single worker runs the tasks, and their callbacks, in order
+        pool._executor.submit(lambda: None).result()
+
+        self.assertTrue(pool.submit(release.wait))
+
+
+class ConcurrentRenditionTests(TransactionTestCase):
+    """Tests rendering an image shared by recipes from several threads"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.recipes = [
+            Recipe.objects.create(
+                user=user,
+                title=title,
+                time_minutes=10,
+                price=5.00
+            )
+            for title in ("Pancakes", "Waffles")
+        ]
+
+        for recipe in self.recipes:
+            recipe.image.save('pancakes.jpg', sample_image((400, 200)))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_generate_renditions_concurrently(self):
+        """should render a shared image once, at the canonical paths"""
+        name = self.recipes[0].image.name
+        barrier = threading.Barrier(2, timeout=10)
+        results = []
+
+        def lock(name):
+            # Both renderers reach the lock before either takes it
+            barrier.wait()
+            lock_content(name)
+
+        def run(recipe):
+            try:
+                results.append(generate_renditions(recipe.id, name))
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=run, args=(recipe,))
+            for recipe in self.recipes
+        ]
+
+        with patch('recipe.renditions.lock_content', lock):
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        renditions = [
+            Recipe.objects.get(pk=recipe.pk).image_renditions
+            for recipe in self.recipes
+        ]
+        directory = os.path.join(
+            self.media_root,
+            os.path.dirname(renditions[0]['thumbnail'])
+        )
+
+        self.assertEqual(results, [True, True])
+        self.assertEqual(renditions[0], renditions[1])
+        self.assertCountEqual(
+            os.listdir(directory),
+            [os.path.basename(path) for path in renditions[0].values()]
+        )
@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.rows import plan_fields, related_ids
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class ValuesListTests(TestCase):
+    """Tests listing from rows against listing with the serializers"""
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = get_user_model().objects.create_user(
+            "test@mail.com",
+            "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ("Vegan", "Dessert", "Quick")
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ("Sugar", "Flour")
+        ]
+        first = Recipe.objects.create(
+            user=self.user,
+            title="Cake",
+            time_minutes=45,
+            price=12.5,
+            link="https://example.com/cake",
+            image_renditions={'thumbnail': 'recipe/thumbnail.webp'}
+        )
+        # Related in another order than by ID
+        first.tags.add(tags[2])
+        first.tags.add(tags[0])
+        first.ingredients.add(*ingredients)
+        second = Recipe.objects.create(
+            user=self.user,
+            title="Cake pops",
+            time_minutes=20,
+            price=3
+        )
+        second.tags.add(tags[1], tags[2])
+        Recipe.objects.create(user=self.user, title="Tea", time_minutes=5,
+                              price=1)
+
+    def assertSameResponses(self, url, params=None):
+        """Compares the response from rows with the serializer one"""
+        res = self.client.get(url, params)
+        cache.clear()
+
+        with patch('recipe.rows.plan_fields', return_value=None):
+            expected = self.client.get(url, params)
+
+        cache.clear()
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res.content, expected.content)
+
+        return res
+
+    def test_list_recipes_same_json(self):
+        """should list recipes exactly like the serializer"""
+        res = self.assertSameResponses(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_list_recipes_pages_same_json(self):
+        """should paginate recipes exactly like the serializer"""
+        res = self.assertSameResponses(RECIPES_URL, {'page_size': 2})
+
+        self.assertSameResponses(res.data['next'])
+
+    def test_search_recipes_same_json(self):
+        """should list ranked search results exactly like the serializer"""
+        res = self.assertSameResponses(
+            RECIPES_URL,
+            {'search': 'cake', 'page_size': 1}
+        )
+
+        self.assertSameResponses(res.data['next'])
+
+    def test_list_recipe_fields_same_json(self):
+        """should list sparse fieldsets exactly like the serializer"""
+        self.assertSameResponses(RECIPES_URL, {'fields': 'tags,price'})
+
+    def test_list_tags_same_json(self):
+        """should list tags and ingredients exactly like the serializer"""
+        res = self.assertSameResponses(
+            TAGS_URL,
+            {'ordering': '-recipe_count', 'page_size': 2}
+        )
+
+        self.assertSameResponses(res.data['next'])
+        self.assertSameResponses(INGREDIENTS_URL, {'assigned_only': 1})
+
+    def test_related_ids(self):
+        """should group the related IDs of each object in order"""
+        recipe = Recipe.objects.get(title="Cake")
+        other = Recipe.objects.get(title="Tea")
+
+        ids = related_ids(Recipe, 'tags', [recipe.pk, other.pk])
+
+        self.assertEqual(
+            ids[recipe.pk],
+            sorted(recipe.tags.values_list('pk', flat=True))
+        )
+        self.assertNotIn(other.pk, ids)
+
+    def test_plan_fields_needs_instances(self):
+        """should not plan serializers with nested objects"""
+        self.assertIsNotNone(plan_fields(RecipeSerializer()))
+        self.assertIsNone(plan_fields(RecipeDetailSerializer()))
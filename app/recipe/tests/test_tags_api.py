@@ -1,16 +1,20 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Tag, Recipe
 
+from recipe.filters import has_trigram
 from recipe.serializers import TagSerializer
 
 
 TAGS_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_TAGS_URL = reverse('recipe:tag-autocomplete')
 
 
 class PublicTagsAPITests(TestCase):
@@ -45,11 +49,26 @@ class PrivateTagsAPITests(TestCase):
 
         res = self.client.get(TAGS_URL)
 
-        tags = Tag.objects.all().order_by('-name')
+        tags = Tag.objects.all().order_by('-name', 'id')
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_paginate_tags_with_cursor(self):
+        """should return the tags in pages ordered by name"""
+        for name in ("Arab", "Brazilian", "Chinese"):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        next_res = self.client.get(res.data['next'])
+
+        names = [tag['name'] for tag in res.data['results']]
+        next_names = [tag['name'] for tag in next_res.data['results']]
+
+        self.assertEqual(names, ["Chinese", "Brazilian"])
+        self.assertEqual(next_names, ["Arab"])
+        self.assertIsNone(next_res.data['next'])
 
     def test_tags_limited_to_user(self):
         """should retrieve the tags for an authenticated user"""
@@ -64,8 +83,8 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tags_successful(self):
         """should create new tags successfully"""
@@ -79,6 +98,30 @@ class PrivateTagsAPITests(TestCase):
 
         self.assertTrue(tag_exists)
 
+    def test_create_tag_duplicate_name(self):
+        """should not allow two tags with the same name for a user"""
+        Tag.objects.create(user=self.user, name="Brazilian")
+
+        res = self.client.post(TAGS_URL, {"name": "Brazilian"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name="Brazilian").count(),
+            1
+        )
+
+    def test_create_tag_name_used_by_other_user(self):
+        """should allow a tag name already used by another user"""
+        user2 = get_user_model().objects.create_user(
+            "other@mail.com",
+            "pass123"
+        )
+        Tag.objects.create(user=user2, name="Vegan")
+
+        res = self.client.post(TAGS_URL, {"name": "Vegan"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
     def test_create_tag_invalid(self):
         """should not allow to create a tag with invalid name"""
         payload = {"name": ""}
@@ -105,8 +148,8 @@ class PrivateTagsAPITests(TestCase):
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_assigned_unique(self):
         """should return unique assigned tags"""
@@ -131,4 +174,226 @@ class PrivateTagsAPITests(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_retrieve_tags_assigned_with_exists(self):
+        """should find assigned tags with EXISTS instead of a distinct join"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        sql = queries.captured_queries[-1]['sql']
+
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+
+    def test_order_tags_by_recipe_count(self):
+        """should list the most used tags first"""
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Rare', 'Popular', 'Unused')
+        ]
+
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                title=f"Recipe {i}",
+                time_minutes=10,
+                price=5.00,
+                user=self.user
+            )
+            recipe.tags.add(tags[1])
+
+        recipe.tags.add(tags[0])
+
+        res = self.client.get(TAGS_URL, {'ordering': '-recipe_count'})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ['Popular', 'Rare', 'Unused']
+        )
+
+    def test_paginate_tags_by_recipe_count_ties(self):
+        """should page through tied tags by id, without offsetting"""
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(25)
+        ]
+        ids = sorted(tag.id for tag in tags)
+        params = {'ordering': '-recipe_count', 'page_size': 10}
+
+        res = self.client.get(TAGS_URL, params)
+        pages = [res.data['results']]
+
+        with CaptureQueriesContext(connection) as queries:
+            while res.data['next']:
+                res = self.client.get(res.data['next'])
+                pages.append(res.data['results'])
+
+        previous_pages = [res.data['results']]
+
+        while res.data['previous']:
+            res = self.client.get(res.data['previous'])
+            previous_pages.insert(0, res.data['results'])
+
+        self.assertEqual(
+            [tag['id'] for page in pages for tag in page],
+            ids
+        )
+        self.assertEqual(previous_pages, pages)
+        self.assertFalse(any(
+            'OFFSET' in query['sql'] for query in queries.captured_queries
+        ))
+
+    def test_paginate_tags_by_recipe_count_ascending(self):
+        """should page through the least used tags first, newest first"""
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(5)
+        ]
+        recipe = Recipe.objects.create(
+            title="Recipe",
+            time_minutes=10,
+            price=5.00,
+            user=self.user
+        )
+        recipe.tags.add(tags[0])
+
+        res = self.client.get(
+            TAGS_URL,
+            {'ordering': 'recipe_count', 'page_size': 2}
+        )
+        ids = [tag['id'] for tag in res.data['results']]
+
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [tag['id'] for tag in res.data['results']]
+
+        self.assertEqual(ids, [tag.id for tag in reversed(tags)])
+
+    def test_paginate_tags_invalid_cursor(self):
+        """should refuse a cursor with values not fitting the ordering"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        # Encodes the position ["a", 1]
+        res = self.client.get(TAGS_URL, {
+            'ordering': '-recipe_count',
+            'cursor': 'cD0lNUIlMjJhJTIyJTJDKzElNUQ='
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_order_tags_invalid(self):
+        """should refuse to order by an unknown field"""
+        res = self.client.get(TAGS_URL, {'ordering': 'user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_tags_requested_fields(self):
+        """should list only the requested fields, in any ordering"""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Dessert')
+        recipe = Recipe.objects.create(
+            title="Pie",
+            time_minutes=30,
+            price=5.00,
+            user=self.user
+        )
+        recipe.tags.add(tag2)
+
+        res = self.client.get(
+            TAGS_URL,
+            {'fields': 'id', 'ordering': '-recipe_count', 'page_size': 1}
+        )
+        next_page = self.client.get(res.data['next'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [{'id': tag2.id}])
+        self.assertEqual(next_page.data['results'], [{'id': tag1.id}])
+
+
+class TagAutocompleteAPITests(TestCase):
+    """Test suggesting tags for a partially typed name"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@mail.com",
+            password="testpass"
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_autocomplete_prefix(self):
+        """should suggest the tags starting with q, regardless of case"""
+        dinner = Tag.objects.create(user=self.user, name='dinner')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+        Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(
+            user=get_user_model().objects.create_user(
+                email="other@mail.com",
+                password="testpass"
+            ),
+            name='Diet'
+        )
+
+        res = self.client.get(AUTOCOMPLETE_TAGS_URL, {'q': 'D'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': dessert.id, 'name': 'Dessert'},
+            {'id': dinner.id, 'name': 'dinner'},
+        ])
+
+    def test_autocomplete_wildcards(self):
+        """should match the LIKE wildcards of q literally"""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='100% vegan')
+
+        percent = self.client.get(AUTOCOMPLETE_TAGS_URL, {'q': '100%'})
+        underscore = self.client.get(AUTOCOMPLETE_TAGS_URL, {'q': '_'})
+
+        self.assertEqual(percent.data, [{'id': tag.id, 'name': '100% vegan'}])
+        self.assertEqual(underscore.data, [])
+
+    def test_autocomplete_similar(self):
+        """should complete the suggestions with similar names"""
+        if not has_trigram('default'):
+            self.skipTest('pg_trgm is not installed')
+
+        Tag.objects.create(user=self.user, name='Tomato')
+        Tag.objects.create(user=self.user, name='Tomatoes')
+        Tag.objects.create(user=self.user, name='Potato')
+
+        res = self.client.get(AUTOCOMPLETE_TAGS_URL, {'q': 'tomatoe'})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Tomatoes', 'Tomato']
+        )
+
+    def test_autocomplete_limit(self):
+        """should cap the number of suggestions"""
+        Tag.objects.bulk_create(
+            Tag(user=self.user, name=f'Tag {i}') for i in range(60)
+        )
+
+        default = self.client.get(AUTOCOMPLETE_TAGS_URL, {'q': 'tag'})
+        capped = self.client.get(
+            AUTOCOMPLETE_TAGS_URL,
+            {'q': 'tag', 'limit': 100}
+        )
+        invalid = self.client.get(
+            AUTOCOMPLETE_TAGS_URL,
+            {'q': 'tag', 'limit': 'all'}
+        )
+
+        self.assertEqual(len(default.data), 10)
+        self.assertEqual(len(capped.data), 50)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_empty(self):
+        """should suggest nothing for an empty query"""
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(AUTOCOMPLETE_TAGS_URL, {'q': ' '})
+
+        self.assertEqual(res.data, [])
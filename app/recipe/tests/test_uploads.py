@@ -0,0 +1,207 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import exceptions, status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe.uploads import HEADER_LIMIT, ImageTooLarge, ImageUploadHandler
+
+
+def sample_upload(size=(10, 10), image_format='JPEG', noise=False):
+    """Returns an uploadable image file"""
+    if noise:
+        image = Image.effect_noise(size, 50).convert('RGB')
+    else:
+        image = Image.new('RGB', size)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+
+    return SimpleUploadedFile(
+        f'image.{image_format.lower()}',
+        buffer.getvalue()
+    )
+
+
+class ImageUploadHandlerTests(TestCase):
+    """Tests the streaming checks of uploaded images"""
+
+    def setUp(self):
+        self.handler = ImageUploadHandler()
+        self.handler.new_file('image', 'image.jpg', 'image/jpeg', None)
+
+    @override_settings(MAX_IMAGE_UPLOAD_SIZE=100000)
+    def test_stop_at_size_limit(self):
+        """should stop at the first chunk over the size limit"""
+        data = sample_upload((600, 600), noise=True).read()
+        chunks = [
+            data[i:i + self.handler.chunk_size]
+            for i in range(0, len(data), self.handler.chunk_size)
+        ]
+
+        self.handler.receive_data_chunk(chunks[0], 0)
+
+        with self.assertRaises(ImageTooLarge):
+            self.handler.receive_data_chunk(chunks[1], len(chunks[0]))
+
+        self.assertTrue(self.handler.file.closed)
+
+    def test_reject_unparsable_header(self):
+        """should give up on a header not parsed within the limit"""
+        with self.assertRaises(exceptions.ValidationError):
+            for start in range(0, HEADER_LIMIT, self.handler.chunk_size):
+                self.handler.receive_data_chunk(
+                    b'x' * self.handler.chunk_size,
+                    start
+                )
+
+        self.assertTrue(self.handler.file.closed)
+
+
+class ImageUploadAPITests(TestCase):
+    """Tests the limits enforced on images uploaded to recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@mail.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Soup",
+            time_minutes=10,
+            price=5.00
+        )
+        self.url = reverse('recipe:recipe-upload-image', args=[self.recipe.id])
+
+    def upload(self, image):
+        """Uploads an image to the recipe"""
+        res = self.client.post(self.url, {'image': image}, format='multipart')
+        self.recipe.refresh_from_db()
+
+        self.assertFalse(self.recipe.image)
+
+        return res
+
+    @override_settings(MAX_IMAGE_UPLOAD_SIZE=1000)
+    def test_upload_image_too_large(self):
+        """should refuse images over the size limit"""
+        res = self.upload(sample_upload((600, 600), noise=True))
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertIn('image', res.data)
+
+    @override_settings(MAX_IMAGE_PIXELS=50)
+    def test_upload_image_too_many_pixels(self):
+        """should refuse images over the pixel limit"""
+        res = self.upload(sample_upload((10, 10)))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', res.data['image'][0])
+
+    def test_upload_image_unsupported_format(self):
+        """should refuse images in formats other than the allowed ones"""
+        res = self.upload(sample_upload((10, 10), 'BMP'))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('BMP', res.data['image'][0])
+
+
+class ImageDeduplicationAPITests(TestCase):
+    """Tests the sharing of identical images between recipes"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.submit_patch = patch('recipe.renditions.pool.submit')
+        self.submit_patch.start()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@mail.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe1, self.recipe2 = (
+            Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=10,
+                price=5.00
+            )
+            for title in ("Soup", "Salad")
+        )
+
+    def tearDown(self):
+        self.submit_patch.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def upload(self, recipe, image):
+        """Uploads an image to a recipe, running the commit hooks"""
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        image.seek(0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(url, {'image': image}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+
+        return recipe.image.name
+
+    def test_identical_uploads_share_file(self):
+        """should store an image uploaded to many recipes once"""
+        image = sample_upload((20, 20))
+        digest = hashlib.sha256(image.read()).hexdigest()
+
+        name1 = self.upload(self.recipe1, image)
+        name2 = self.upload(self.recipe2, image)
+
+        self.assertEqual(name1, f'uploads/recipe/{digest}.jpeg')
+        self.assertEqual(name1, name2)
+
+    def test_release_unused_image(self):
+        """should delete an image once no recipe uses it"""
+        name = self.upload(self.recipe1, sample_upload((20, 20)))
+        self.upload(self.recipe2, sample_upload((20, 20)))
+        path = os.path.join(self.media_root, name)
+
+        self.upload(self.recipe1, sample_upload((30, 30)))
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe2.delete()
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_release_image_uses_index(self):
+        """should look the recipes using an image up through an index"""
+        name = self.upload(self.recipe1, sample_upload((20, 20)))
+
+        with connection.cursor() as cursor:
+            # The table is too small for the planner to prefer the index
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = Recipe.objects.filter(image=name).explain()
+
+        self.assertIn('recipe_image_idx', plan)
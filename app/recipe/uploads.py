@@ -0,0 +1,117 @@
+import hashlib
+import io
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from rest_framework import exceptions, status
+
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Headers not parsed within this many bytes are taken as invalid images
+HEADER_LIMIT = 256 * 2 ** 10
+
+# Room left in the request body for the multipart boundaries and fields
+FORM_OVERHEAD = 64 * 2 ** 10
+
+
+class ImageTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'The image is too large.'
+    default_code = 'image_too_large'
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Streams an image to a temporary file, rejecting it as early as possible
+
+    The body is refused before reading when its length is over the limit,
+    and the upload stops at the first chunk going over it. The format and
+    dimensions are read from the image header as it arrives, without
+    decoding any pixel, and the content is hashed to name the stored file.
+    """
+    chunk_size = 64 * 2 ** 10
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """Refuses bodies too large to hold an acceptable image"""
+        if content_length > settings.MAX_IMAGE_UPLOAD_SIZE + FORM_OVERHEAD:
+            raise self.too_large()
+
+    def new_file(self, *args, **kwargs):
+        """Starts a temporary file for the upload"""
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b''
+        self.sniffed = False
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        """Writes a chunk, checking the size and header so far"""
+        self.received += len(raw_data)
+
+        if self.received > settings.MAX_IMAGE_UPLOAD_SIZE:
+            self.abort(self.too_large())
+
+        if not self.sniffed:
+            self.sniff(raw_data)
+
+        self.hasher.update(raw_data)
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        """Returns the uploaded file along with its content hash"""
+        file = super().file_complete(file_size)
+        file.sha256 = self.hasher.hexdigest()
+
+        return file
+
+    def sniff(self, raw_data):
+        """Checks the format and dimensions once the header is received"""
+        self.header += raw_data
+
+        try:
+            with Image.open(io.BytesIO(self.header)) as image:
+                image_format, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            self.abort(self.invalid('Ensure the image has fewer pixels.'))
+        except (OSError, SyntaxError, ValueError):
+            if len(self.header) >= HEADER_LIMIT:
+                self.abort(self.invalid(
+                    'Upload a valid image. The file you uploaded was either '
+                    'not an image or a corrupted image.'
+                ))
+            return
+
+        self.sniffed, self.header = True, b''
+
+        if image_format not in ALLOWED_FORMATS:
+            self.abort(self.invalid(
+                f'Unsupported image format {image_format}, use one of '
+                f'{", ".join(ALLOWED_FORMATS)}.'
+            ))
+
+        if width * height > settings.MAX_IMAGE_PIXELS:
+            self.abort(self.invalid(
+                f'Ensure the image has at most {settings.MAX_IMAGE_PIXELS} '
+                f'pixels (it has {width * height}).'
+            ))
+
+    def abort(self, exc):
+        """Discards the temporary file and stops the upload"""
+        self.file.close()
+        raise exc
+
+    def too_large(self):
+        """Returns the error for an upload over the size limit"""
+        return ImageTooLarge({'image': [
+            f'Ensure the image has at most '
+            f'{settings.MAX_IMAGE_UPLOAD_SIZE} bytes.'
+        ]})
+
+    def invalid(self, message):
+        """Returns the error for an unacceptable image"""
+        return exceptions.ValidationError({'image': [message]})
@@ -1,20 +1,40 @@
+import itertools
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
+
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from core.models import Tag, Ingredient, Recipe
 
-from recipe import serializers
+from user.authentication import CachedTokenAuthentication
 
+from recipe import filters, renditions, serializers
+from recipe.cache import CachedListMixin, bump_generation
+from recipe.conditional import ConditionalGetMixin
+from recipe.fieldsets import SparseFieldsetMixin
+from recipe.pagination import NameCursorPagination, RecipeCursorPagination
+from recipe.rows import ValuesListMixin
+from recipe.uploads import ImageUploadHandler
 
-class BaseRecipesViewSet(viewsets.GenericViewSet,
+
+class BaseRecipesViewSet(ValuesListMixin,
+                         SparseFieldsetMixin,
+                         viewsets.GenericViewSet,
                          mixins.ListModelMixin,
                          mixins.CreateModelMixin):
     """Base viewset for Recipes API models"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = NameCursorPagination
+    autocomplete_limit = 10
+    max_autocomplete_limit = 50
 
     def get_queryset(self):
         """Returns objects for the current authenticated user only"""
@@ -24,64 +44,96 @@ class BaseRecipesViewSet(viewsets.GenericViewSet,
         queryset = self.queryset
 
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(
+                filters.assigned_exists(queryset.model)
+            )
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', 'id')
 
     def perform_create(self, serializer):
         """Creates a new tag"""
         serializer.save(user=self.request.user)
 
+    @action(methods=['GET'], detail=False, url_path='autocomplete')
+    def autocomplete(self, request):
+        """Suggest the objects whose name matches the q query param"""
+        try:
+            limit = int(request.query_params.get(
+                'limit',
+                self.autocomplete_limit
+            ))
+        except ValueError:
+            limit = 0
 
-class TagViewSet(BaseRecipesViewSet):
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be a positive integer.'})
+
+        return Response(filters.autocomplete(
+            self.get_queryset(),
+            request.query_params.get('q', ''),
+            min(limit, self.max_autocomplete_limit)
+        ))
+
+
+class TagViewSet(CachedListMixin, BaseRecipesViewSet):
     """Handles displaying the tags from database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
 
 
-class IngredientViewSet(BaseRecipesViewSet):
+class IngredientViewSet(CachedListMixin, BaseRecipesViewSet):
     """Handles displaying ingredients"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, ValuesListMixin,
+                    SparseFieldsetMixin, viewsets.ModelViewSet):
     """Handles displaying recipes"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+    sparse_actions = ('list', 'retrieve', 'export')
+    export_chunk_size = 2000
 
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
 
-    def _params_to_ints(self, qs):
-        """Convert a list of string IDs to a list of integers"""
-        return [int(str_id) for str_id in qs.split(',')]
-
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user"""
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
+        queryset = self.queryset.prefetch_related('tags', 'ingredients')
 
-        queryset = self.queryset
+        for field_name in ('tags', 'ingredients'):
+            value = self.request.query_params.get(field_name)
+
+            if value:
+                queryset = filters.filter_related(
+                    queryset,
+                    field_name,
+                    filters.params_to_ints(field_name, value),
+                    self.request.query_params.get(
+                        f'{field_name}_mode',
+                        filters.MATCH_ANY
+                    )
+                )
 
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+        search = self.request.query_params.get('search')
 
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        if search:
+            queryset = filters.search(queryset, search)
 
         return queryset.filter(user=self.request.user)
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'export'):
             return serializers.RecipeDetailSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'bulk_create':
+            return serializers.RecipeBulkSerializer
 
         return self.serializer_class
 
@@ -92,14 +144,28 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe"""
+        # Set before the body is parsed, on the underlying Django request
+        request._request.upload_handlers = [
+            ImageUploadHandler(request._request)
+        ]
         recipe = self.get_object()
+        previous_image = recipe.image.name
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
 
         if serializer.is_valid():
-            serializer.save()
+            # Reusing a stored file holds its lock until the recipe refers
+            # to it, so it cannot be released in between
+            with transaction.atomic():
+                # The renditions of the previous image no longer apply
+                recipe = serializer.save(image_renditions={})
+
+            renditions.queue_renditions(recipe)
+
+            if recipe.image.name != previous_image:
+                renditions.release_image(previous_image)
 
             return Response(
                 serializer.data,
@@ -110,3 +176,57 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk_create(self, request):
+        """Create many recipes at once, or none if any of them is invalid"""
+        serializer = self.get_serializer(data=request.data, many=True)
+
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer.save(user=self.request.user)
+        # Bulk inserts send no model signals
+        bump_generation(self.request.user.pk)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream every recipe of the user as newline-delimited JSON"""
+        queryset = self.filter_queryset(self.get_queryset())
+        # iterator() ignores prefetch_related, each chunk prefetches its own.
+        # The database is fixed now, as the response streams after routing
+        recipes = queryset.using(queryset.db).prefetch_related(
+            None
+        ).order_by('id').iterator(chunk_size=self.export_chunk_size)
+        lookups = self.get_prefetch_lookups()
+
+        def lines():
+            encoder = JSONEncoder(ensure_ascii=False)
+
+            while True:
+                chunk = list(
+                    itertools.islice(recipes, self.export_chunk_size)
+                )
+
+                if not chunk:
+                    return
+
+                prefetch_related_objects(chunk, *lookups)
+
+                for data in self.get_serializer(chunk, many=True).data:
+                    yield encoder.encode(data) + '\n'
+
+        response = StreamingHttpResponse(
+            lines(),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+
+        return response
@@ -0,0 +1,84 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.cache import LRUCache
+from core.db.routers import use_primary
+
+
+class TokenCache:
+    """Caches the user resolved from each auth token
+
+    Entries live in the Django cache named by TOKEN_CACHE_ALIAS, so every
+    worker sharing it sees the invalidations. Without an alias they live in
+    a bounded in-process LRU, which other processes never invalidate.
+    """
+
+    def __init__(self):
+        self._local = None
+
+    @property
+    def backend(self):
+        """Returns the cache storing the entries"""
+        if settings.TOKEN_CACHE_ALIAS:
+            return caches[settings.TOKEN_CACHE_ALIAS]
+
+        if self._local is None:
+            self._local = LRUCache(
+                settings.TOKEN_CACHE_MAX_SIZE,
+                settings.TOKEN_CACHE_TTL
+            )
+
+        return self._local
+
+    def _cache_key(self, key):
+        """Hashes the token, so it is never stored in clear in the cache"""
+        return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        """Returns the cached (user, token) pair of a token key"""
+        credentials = self.backend.get(self._cache_key(key))
+
+        if credentials is None:
+            return None
+
+        return tuple(copy.copy(obj) for obj in credentials)
+
+    def set(self, key, credentials):
+        """Caches the (user, token) pair of a token key"""
+        if settings.TOKEN_CACHE_ALIAS:
+            self.backend.set(
+                self._cache_key(key),
+                credentials,
+                settings.TOKEN_CACHE_TTL
+            )
+        else:
+            self.backend.set(self._cache_key(key), credentials)
+
+    def delete(self, key):
+        """Invalidates the cached pair of a token key"""
+        self.backend.delete(self._cache_key(key))
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication skipping the database for recently seen tokens"""
+
+    def authenticate_credentials(self, key):
+        """Resolves the token from the cache before the database"""
+        credentials = token_cache.get(key)
+
+        if credentials is None:
+            # A token just created may not have reached the replicas yet
+            with use_primary():
+                credentials = super().authenticate_credentials(key)
+
+            token_cache.set(key, credentials)
+
+        return credentials
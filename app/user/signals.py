@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stops authenticating with a deleted token"""
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drops the cached tokens of a changed (deactivated, new password) user"""
+    if created:
+        return
+
+    for key in Token.objects.filter(user=instance).values_list(
+        'key',
+        flat=True
+    ):
+        token_cache.delete(key)
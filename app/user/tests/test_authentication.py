@@ -0,0 +1,86 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from user.authentication import TokenCache, token_cache
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Tests the cached token authentication"""
+
+    def setUp(self):
+        token_cache.backend.clear()
+
+        self.user = get_user_model().objects.create_user(
+            email="test@mail.com",
+            password="testpass",
+            name="John Doe"
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_resolved_from_cache(self):
+        """should not query the database for a recently used token"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_invalidated(self):
+        """should reject a cached token after it is deleted"""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """should reject the cached token of a deactivated user"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidated(self):
+        """should resolve the token again after the password changes"""
+        self.client.patch(ME_URL, {'password': 'newpassword'})
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_invalidation_shared_by_workers(self):
+        """should invalidate a token cached by another worker by default"""
+        worker1, worker2 = TokenCache(), TokenCache()
+
+        worker1.set(self.token.key, (self.user, self.token))
+        worker2.delete(self.token.key)
+
+        self.assertIsNone(worker1.get(self.token.key))
+
+    @override_settings(TOKEN_CACHE_ALIAS='')
+    def test_token_cached_in_process(self):
+        """should cache the tokens in the process without a cache alias"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)